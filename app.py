@@ -1,10 +1,38 @@
 # app.py
-from flask import Flask, request, Response, render_template, abort, send_from_directory
-from html import escape
-from markupsafe import Markup
+from flask import Flask, request, Response, render_template, abort
+from src.fragments import Fragment, FragmentCache
+from src.http_optimize import ResponseOptimizer
+from src.pdf_delivery import ArtifactServer
+from src.compact_store import CompactJobStore
+from src.ingest import PersonaSnapshot
+from src.artifact_writer import default_writer
+from src.shared_cache import SharedPersonaCache, folder_signature
+from src.prefetch import Prefetcher
+from src.singleflight import SingleFlight
+from src.persona_watch import PersonaEvent, PersonaWatcher
+from src.stores import MemoryStore
 from src.utils import load_jobs_from_persona_folder
-from src.resume_agent import ResumeTailorAgent, AgentState, JobStore, ResumeStore, ClarificationNeeded
-import json, os
+import hashlib, json, os, threading
+from typing import NamedTuple
+
+
+def _resume_agent():
+    """Import the agent module on first use; it pulls in langgraph and langchain_openai."""
+    from src import resume_agent
+    return resume_agent
+
+
+class RunContext(NamedTuple):
+    """Search state a tailoring run uses, captured when it starts (or is prefetched)."""
+    persona_path: str | None
+    jobs: object
+    resume: str | None
+
+    @property
+    def candidate(self) -> str:
+        """Candidate id for the run: the persona, so artifacts index per (persona, job)."""
+        return os.path.basename(self.persona_path) if self.persona_path else "cand-999"
+
 
 class API:
     # ---- Mock store (replace with your real data layer) ----
@@ -336,10 +364,62 @@ class API:
         self.register_routes(app)
         import os
         os.environ["OPEN_AI_API_KEY"] = ""
-        self.agent = ResumeTailorAgent()
+        # Built on first use (or up front by preload()), see `agent`.
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        # Identical tailoring requests in flight share one agent run; a clarification
+        # question is an outcome, not an error, in /api/metrics.
+        self.singleflight = SingleFlight(expected=lambda: (_resume_agent().ClarificationNeeded,))
+        # PREFETCH_TAILORING=1: opening a job's detail panel starts its agent run in the
+        # background (see src/prefetch.py for the budget and cancellation rules).
+        self.prefetcher = None
+        if os.environ.get("PREFETCH_TAILORING") == "1":
+            self.prefetcher = Prefetcher(
+                self.singleflight,
+                budget_per_hour=int(os.environ.get("PREFETCH_BUDGET_PER_HOUR", "30")),
+                keep_errors=lambda: (_resume_agent().ClarificationNeeded,),  # resolved on first prefetch
+            )
         self.Jobs = None
         self.Resume = None
         self.Persona_path = None
+        self.fragments = FragmentCache()
+        self.artifacts = ArtifactServer(app)
+        # Prebuilt by `python -m src.ingest`; falls back to parsing persona folders.
+        self.snapshot = PersonaSnapshot.open_default()
+        # One mmap'd copy of loaded personas for all gunicorn workers (PERSONA_CACHE=off disables).
+        self.persona_cache = SharedPersonaCache() if os.environ.get("PERSONA_CACHE", "shared") != "off" else None
+        # Started per worker process on its first request (threads do not survive fork).
+        self.watcher = None
+        self._watch_pid = None
+        self._watch_lock = threading.Lock()
+        app.before_request(self._ensure_watcher)
+        self._partials = None
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            with self._agent_lock:
+                if self._agent is None:
+                    self._agent = _resume_agent().ResumeTailorAgent()
+        return self._agent
+
+    def preload(self) -> None:
+        """
+        Build every read-only structure now instead of on first request. Meant for
+        the gunicorn master with `--preload`: forked workers then share the compiled
+        graph, PDF styles, templates and persona index copy-on-write.
+        """
+        import gc
+        from src.utils import resume_styles
+        import PyPDF2  # noqa: F401  (warm the import for resume extraction)
+
+        self.agent
+        self.partials
+        resume_styles()
+        # Move everything built so far out of GC tracking, so collections in the
+        # workers don't write to (and un-share) these pages.
+        gc.collect()
+        gc.freeze()
 
     def register_routes(self, app):
         app.add_url_rule("/", view_func=self.index)
@@ -348,64 +428,196 @@ class API:
         app.add_url_rule("/api/job/<job_id>", view_func=self.job_detail, methods=["GET"])
         app.add_url_rule('/personas/<persona>/<filename>', view_func=self.serve_pdf, methods=["GET"])
         app.add_url_rule("/api/clarify-cv", view_func=self.clarify_cv, methods=["POST"])
+        app.add_url_rule("/api/metrics", view_func=self.metrics, methods=["GET"])
+
+    # ---- personas/ change notifications ----
+    def _ensure_watcher(self):
+        if self._watch_pid == os.getpid():
+            return
+        with self._watch_lock:
+            if self._watch_pid == os.getpid():
+                return
+            self._watch_pid = os.getpid()
+            backend = os.environ.get("PERSONA_WATCH", "auto")  # auto | inotify | poll | off
+            if backend == "off" or not os.path.isdir("personas"):
+                return
+            self.watcher = PersonaWatcher("personas", backend=backend)
+            self.watcher.subscribe(self.on_persona_events)
+            self.watcher.start()
 
-    def _meta_line(self, job: dict) -> str:
-        bits = [job.get("location") or "", job.get("type") or "", job.get("salary") or ""]
-        bits = [escape(b) for b in bits if b]
-        return " • ".join(bits)
+    def on_persona_events(self, events: list[PersonaEvent]) -> None:
+        """Invalidate only what the changed files feed: one persona's data, one job's fragments."""
+        for persona in {e.persona for e in events if e.kind != "artifact"}:
+            if self.persona_cache is not None:
+                self.persona_cache.invalidate(persona, self._persona_signature(persona))
+        for e in events:
+            persona_path = os.path.join("personas", e.persona)
+            if e.kind == "artifact":
+                self.artifacts.index.refresh(e.persona, e.path)
+            elif e.kind == "persona":
+                self.artifacts.index.refresh(e.persona)
+                self.fragments.discard(lambda key: key[1] == persona_path)
+            elif e.kind == "job":
+                self.fragments.discard(
+                    lambda key: key[1] == persona_path and (key[0] == "cards" or key[2] == e.job_id)
+                )
+            if self.prefetcher is not None and e.kind in ("job", "persona"):
+                # key: ("agent", persona_path, job_id, resume_hash, answer)
+                self.prefetcher.cancel(
+                    lambda key: key[1] == persona_path and (e.kind == "persona" or key[2] == e.job_id)
+                )
+
+    # ---- HTML fragments (compiled Jinja macros + fragment cache) ----
+    @property
+    def partials(self):
+        """Compiled `templates/partials/jobs.html` module; macros are plain callables."""
+        if self._partials is None:
+            self._partials = self.app.jinja_env.get_template("partials/jobs.html").module
+        return self._partials
 
     def render_job_cards(self, jobs: list[dict]) -> str:
         """Return safe HTML snippet for the jobs list. Cards include data-job-id for clicks."""
         if not jobs:
-            return '<p style="color:#6b7280">No jobs found.</p>'
-
-        parts = []
-        for job in jobs:
-            title = escape(job.get("title") or "Untitled role")
-            summary = escape(" ".join(job.get("summary")) or "")
-            meta = self._meta_line(job)
-            jid = escape(job.get("id") or "", quote=True)
-
-            card_html = f"""
-            <article class="job-card" data-job-id="{jid}" tabindex="0" role="button" aria-label="View details for {title}">
-              <h3>{title}</h3>
-              {'<p class="meta">' + meta + '</p>' if meta else ''}
-              {'<p class="excerpt">' + summary + '</p>' if summary else ''}
-              <button class="btn-outline" type="button">View job</button>
-            </article>
-            """
-            parts.append(card_html)
-
-        return "\n".join(parts)
+            return str(self.partials.empty_results())
+        return "\n".join(str(self.partials.job_card(job)) for job in jobs)
 
     def render_detail_panel(self, job: dict) -> str:
-        title = escape(job.get("title") or "Job")
-        meta  = self._meta_line(job)
-        # Treat description as trusted server-side HTML
-        desc_html = Markup(job.get("description") or "<p>No description available.</p>")
-        url = job.get("url") or ""
-
-        if url:
-            url_attr = escape(url, quote=True)
-            apply_cta = f'<a class="btn-seek" href="{url_attr}" target="_blank" rel="noopener">Apply now</a>'
-        else:
-            apply_cta = '<button class="btn-seek" disabled>Apply now</button>'
-
-        # NOTE: Add data-action="tailor" so the delegated listener can target reliably
-        return f"""
-        <h4 class="title">{title}</h4>
-        {'<p class="meta">' + meta + '</p>' if meta else ''}
-        <div class="body">{desc_html}</div>
-        <div class="actions">
-          {apply_cta}
-          <button class="btn-outline" type="button">Save</button>
-          <button class="btn-outline" type="button">Share</button>
-          <button id="tailorBtn" class="btn-outline" type="button" data-action="tailor">Tailor CV</button>
-        </div>
+        return str(self.partials.detail_panel(job))
+
+    def _fragment_response(self, frag: Fragment) -> Response:
+        body, encoding = frag.select(request.accept_encodings.values())
+        etag = frag.etag_for(encoding)
+        resp = Response(body, mimetype="text/html")
+        resp.set_etag(etag)
+        resp.vary.add("Accept-Encoding")
+        if encoding:
+            resp.content_encoding = encoding
+        if request.if_none_match.contains(etag):
+            resp.status_code = 304
+            resp.set_data(b"")
+            resp.content_length = None
+        return resp
+
+    @staticmethod
+    def _is_persona(name) -> bool:
+        """True only for an existing folder directly under personas/ (search input is untrusted)."""
+        if not isinstance(name, str) or not name or name.startswith(".") or os.sep in name \
+                or (os.altsep and os.altsep in name):
+            return False
+        return os.path.isdir(os.path.join("personas", name))
+
+    def _persona_signature(self, persona: str) -> str:
+        signature = folder_signature(os.path.join("personas", persona))
+        if self.snapshot:
+            signature += f":{os.stat(self.snapshot.path).st_mtime_ns}"
+        return signature
+
+    def _run_context(self) -> RunContext:
+        return RunContext(self.Persona_path, self.Jobs, self.Resume)
+
+    def _run_stores(self, ctx: RunContext | None = None):
+        """Per-run job/resume stores over the current (or captured) search results."""
+        ctx = ctx or self._run_context()
+        return MemoryStore(ctx.jobs or {}), MemoryStore({ctx.candidate: ctx.resume})
+
+    def explain_tailoring(self, job_id: str, tailored_resume: str, ctx: RunContext | None = None) -> dict:
+        """Local diff of the tailored resume against resume.pdf; also saved next to the PDF."""
+        from src.explain import explain_changes
+
+        ctx = ctx or self._run_context()
+        explanation = explain_changes(ctx.resume or "", tailored_resume, (ctx.jobs or {}).get(job_id))
+        if ctx.persona_path:
+            path = os.path.join(ctx.persona_path, f"updated_resume_job{job_id}_explanation.txt")
+            default_writer().submit(path, explanation.to_text(), candidate=ctx.candidate, job=job_id, kind="explanation")
+        return explanation.to_dict()
+
+    def _tailor_key(self, ctx: RunContext, job_id: str, answer: str | None = None) -> tuple:
+        resume_hash = hashlib.sha1((ctx.resume or "").encode("utf-8")).hexdigest()
+        return (ctx.persona_path, job_id, resume_hash, answer)
+
+    def tailor_once(self, job_id: str, answer: str | None = None) -> dict:
+        """
+        Run the agent, PDF and explanation for one (persona, resume, job, answer)
+        input. Identical requests arriving while a run is in flight (double clicks,
+        retries, several tabs) wait for that run and share its result instead of
+        starting their own; ClarificationNeeded reaches every waiter the same way.
         """
+        ctx = self._run_context()
+        key = self._tailor_key(ctx, job_id, answer)
+        result, shared = self.singleflight.do(key, lambda: self._tailor_and_render(key, ctx))
+        if shared:
+            print(f"Tailoring for job {job_id} joined an in-flight run")
+        return result
+
+    def _run_agent(self, ctx: RunContext, job_id: str, answer: str | None) -> dict:
+        messages = [{"role": "candidate", "content": answer}] if answer else []
+        initial = {"job_id": job_id, "candidate_id": ctx.candidate, "messages": messages}
+        thread_id = f"{ctx.candidate}__job-{job_id}"
+        # Stores travel with this run only; the shared agent is never mutated.
+        job_store, resume_store = self._run_stores(ctx)
+        return self.agent.run(initial, thread_id, job_store=job_store, resume_store=resume_store)
+
+    def _tailor_and_render(self, key: tuple, ctx: RunContext) -> dict:
+        persona_path, job_id, _, answer = key
+        run = lambda: self._run_agent(ctx, job_id, answer)
+        if self.prefetcher is not None:
+            # The agent run alone is what prefetch speculates on; rendering stays per request.
+            final_state, source = self.prefetcher.get(("agent",) + key, run)
+            print(f"Tailoring for job {job_id}: agent result {source}")
+        else:
+            final_state = run()
+
+        print("\n---- FINAL KEYS ----")
+        print(list(final_state.keys()))
+        print("\n---- LOG (last few) ----")
+        for m in final_state.get("messages", [])[-4:]:
+            print(f"- {getattr(m, 'content', '')}")
+
+        print("\n---- TAILORED RESUME PREVIEW ----")
+        print((final_state.get("tailored_resume") or ""))
+        tailored_resume = final_state.get("tailored_resume") or ""
+        success = False
+        if tailored_resume and persona_path:
+            from src.utils import save_resume_as_pdf
+            success = save_resume_as_pdf(tailored_resume, persona_path, job_id, candidate=ctx.candidate)
+        explanation = self.explain_tailoring(job_id, tailored_resume, ctx) if tailored_resume else None
+        pdf_url = None
+        if success:
+            self.artifacts.index.register(os.path.join(persona_path, f"updated_resume_job{job_id}.pdf"))
+            pdf_url = f"/personas/{os.path.basename(persona_path)}/updated_resume_job{job_id}.pdf"
+        return {"tailored_resume": tailored_resume, "pdf_url": pdf_url, "explanation": explanation}
+
+    def prefetch_tailoring(self, job_id: str) -> bool:
+        """Queue a speculative agent run for a job whose detail panel was just opened."""
+        if self.prefetcher is None or not self.Persona_path or self.Resume is None:
+            return False
+        ctx = self._run_context()
+        key = self._tailor_key(ctx, job_id)
+        return self.prefetcher.schedule(("agent",) + key, lambda: self._run_agent(ctx, job_id, None),
+                                        group=ctx.persona_path)
+
+    def metrics(self):
+        """Counters for the in-process caches and the tailoring single-flight layer."""
+        data = {
+            "pid": os.getpid(),
+            "singleflight": self.singleflight.stats(),
+            "prefetch": self.prefetcher.stats() if self.prefetcher is not None else None,
+            "fragments": {"hits": self.fragments.hits, "misses": self.fragments.misses},
+        }
+        if self._agent is not None and getattr(self._agent, "router", None) is not None:
+            data["router"] = self._agent.router.stats()
+        data["artifact_writer"] = default_writer().stats()
+        if self._agent is not None and getattr(self._agent, "profile_cache", None) is not None:
+            data["job_profiles"] = self._agent.profile_cache.stats()
+        if self.persona_cache is not None:
+            data["persona_cache"] = self.persona_cache.stats()
+        if self.watcher is not None:
+            data["watcher"] = {"backend": self.watcher.backend_name,
+                               "batches": self.watcher.batches, "events": self.watcher.events}
+        return Response(json.dumps(data), mimetype="application/json")
 
     def serve_pdf(self, persona, filename):
-        return send_from_directory(f'personas/{persona}', filename)
+        return self.artifacts.send(persona, filename)
     def index(self):
         return render_template("index.html")
 
@@ -415,15 +627,26 @@ class API:
 
         keywords = data.get("keywords", [])
         jobs = []
-        if keywords:
+        if keywords and not self._is_persona(keywords):
+            print("Unknown persona:", keywords)
+            self.Jobs, self.Resume, self.Persona_path = CompactJobStore([]), "", None
+        elif keywords:
             # Use the first keyword as the persona folder name
-            jobs, resume, persona_path = load_jobs_from_persona_folder(keywords)
-            print("---------->>>>>>>>", jobs, persona_path)
-            self.Jobs = {job["id"]: job for job in jobs}
+            load = self.snapshot.load_persona if self.snapshot else load_jobs_from_persona_folder
+            if self.persona_cache is not None:
+                self.Jobs, resume, persona_path = self.persona_cache.get(
+                    keywords, lambda: load(keywords), lambda: self._persona_signature(keywords)
+                )
+            else:
+                jobs, resume, persona_path = load(keywords)
+                self.Jobs = CompactJobStore(jobs)
+            print("---------->>>>>>>>", persona_path)
+            jobs = list(self.Jobs.values())
             self.Resume = resume
             self.Persona_path = persona_path
-        html = self.render_job_cards(jobs)
-        return Response(html, mimetype="text/html")
+        key = ("cards", self.Persona_path, tuple((job.get("id"), job.get("source_mtime")) for job in jobs))
+        frag = self.fragments.get_or_render(key, lambda: self.render_job_cards(jobs))
+        return self._fragment_response(frag)
 
     # def tailor_cv(self):
     #     data = request.get_json(silent=True) or {}
@@ -479,20 +702,12 @@ class API:
 
         job_id = data["job_id"]
         message = f"CV tailoring for job {job_id} endpoint hit successfully!"
-        initial: AgentState = {
-            "job_id": job_id,
-            "candidate_id": "cand-999",
-            "messages": []
-        }
-        thread_id = "cand-999__job-123"
+        ra = _resume_agent()
 
         print("------->", self.Resume)
-        self.agent.JobStore = JobStore(self.Jobs)
-        self.agent.Resume_store = ResumeStore({"cand-999": self.Resume})
-
         try:
-            final_state = self.agent.run(initial, thread_id)
-        except ClarificationNeeded as e:
+            result = self.tailor_once(job_id)
+        except ra.ClarificationNeeded as e:
             # Return clarification question to frontend
             print("===============>>>>>>>>>>>> Clarification needed:", str(e))
             return Response(
@@ -500,39 +715,27 @@ class API:
                 mimetype="application/json"
             )
 
-        print("\n---- FINAL KEYS ----")
-        print(list(final_state.keys()))
-        print("\n---- LOG (last few) ----")
-        for m in final_state.get("messages", [])[-4:]:
-            print(f"- {getattr(m, 'content', '')}")
-
-        print("\n---- TAILORED RESUME PREVIEW ----")
-        print((final_state.get("tailored_resume") or ""))
-        tailored_resume = final_state.get("tailored_resume") or ""
-        success = False
-        if tailored_resume and self.Persona_path:
-            from src.utils import save_resume_as_pdf
-            success = save_resume_as_pdf(tailored_resume, self.Persona_path, job_id)
-        if success:
-            pdf_url = f"/personas/{os.path.basename(self.Persona_path)}/updated_resume_job{job_id}.pdf"
+        if result["pdf_url"]:
             return Response(
-                json.dumps({"message": message, "pdf_url": pdf_url}),
+                json.dumps({"message": message, "pdf_url": result["pdf_url"], "explanation": result["explanation"]}),
                 mimetype="application/json"
             )
         else:
             return Response(
-                json.dumps({"message": message}),
+                json.dumps({"message": message, "explanation": result["explanation"]}),
                 mimetype="application/json"
             )
 
     def job_detail(self, job_id: str):
         print("-----------> Job detail request for ID:", job_id)
         print(self.Jobs)
-        job = self.Jobs.get(job_id)
+        job = (self.Jobs or {}).get(job_id)
         if not job:
             abort(404)
-        html = self.render_detail_panel(job)
-        return Response(html, mimetype="text/html")
+        key = ("detail", self.Persona_path, job_id, job.get("source_mtime"))
+        frag = self.fragments.get_or_render(key, lambda: self.render_detail_panel(job))
+        self.prefetch_tailoring(job_id)
+        return self._fragment_response(frag)
 
     def clarify_cv(self):
         print("-------------->>>>>>>>>>>>>>>>>>>>>>>> Clarify CV endpoint hit")
@@ -547,45 +750,34 @@ class API:
                 status=400
             )
 
-        # Reconstruct agent state as needed
-        initial = {
-            "job_id": job_id,
-            "candidate_id": "cand-999",
-            "messages": [{"role": "candidate", "content": answer}]
-        }
-        thread_id = "cand-999__job-123"
-
-        # Set up stores as before
-        self.agent.JobStore = JobStore(self.Jobs)
-        self.agent.Resume_store = ResumeStore({"cand-999": self.Resume})
-
+        ra = _resume_agent()
         try:
-            final_state = self.agent.run(initial, thread_id)
-        except ClarificationNeeded as e:
+            result = self.tailor_once(job_id, answer)
+        except ra.ClarificationNeeded as e:
             return Response(
                 json.dumps({"clarification_needed": True, "question": str(e)}),
                 mimetype="application/json"
             )
 
-        tailored_resume = final_state.get("tailored_resume") or ""
-        success = False
-        if tailored_resume and self.Persona_path:
-            from src.utils import save_resume_as_pdf
-            success = save_resume_as_pdf(tailored_resume, self.Persona_path, job_id)
-        if success:
-            pdf_url = f"/personas/{os.path.basename(self.Persona_path)}/updated_resume_job{job_id}.pdf"
+        if result["pdf_url"]:
             return Response(
-                json.dumps({"message": "CV tailored successfully!", "pdf_url": pdf_url}),
+                json.dumps({"message": "CV tailored successfully!", "pdf_url": result["pdf_url"], "explanation": result["explanation"]}),
                 mimetype="application/json"
             )
         else:
             return Response(
-                json.dumps({"message": "CV tailored, but PDF not generated."}),
+                json.dumps({"message": "CV tailored, but PDF not generated.", "explanation": result["explanation"]}),
                 mimetype="application/json"
             )
 
 app = Flask(__name__)
+ResponseOptimizer(app)
 api = API(app)
 
+# APP_STARTUP=preload builds everything at import (set by gunicorn.conf.py together
+# with preload_app); the default "lazy" defers heavy imports to first use.
+if os.environ.get("APP_STARTUP", "lazy") == "preload":
+    api.preload()
+
 if __name__ == "__main__":
     app.run(debug=True)
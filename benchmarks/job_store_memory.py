@@ -0,0 +1,103 @@
+# job_store_memory.py
+"""
+RSS benchmark: dict-of-dicts job cards vs CompactJobStore over a synthetic
+100k-job persona. Each variant runs in a fresh subprocess so RSS numbers
+are not polluted by the other.
+
+    python -m benchmarks.job_store_memory [--jobs 100000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+COMPANIES = [f"Company {i}" for i in range(400)]
+LOCATIONS = ["Melbourne VIC", "Sydney NSW", "Brisbane QLD", "Perth WA", "Adelaide SA", "Remote (AU)"]
+TAGS = ["", "Featured", "New", "Urgent"]
+SALARIES = ["$120k–$140k", "$150k–$170k", "$165k–$185k", "$110/hr"]
+PARAGRAPH = (
+    "<p>Join our team to design, evaluate and productionise data products that power experiences "
+    "for millions of users. You will partner with Product, Engineering and Design.</p>\n"
+)
+
+
+def synthetic_cards(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    for i in range(1, n + 1):
+        company = rnd.choice(COMPANIES)
+        yield {
+            # json round-trip so every string is a fresh object, as with json.load
+            **json.loads(json.dumps({
+                "id": str(i),
+                "title": f"Data Scientist {i}",
+                "company": company,
+                "tag": rnd.choice(TAGS),
+                "location": rnd.choice(LOCATIONS),
+                "benefits": "Hybrid work; Learning budget; Salary packaging",
+                "summary": [f"Bullet {k} for role {i} at {company}." for k in range(4)],
+                "salary": rnd.choice(SALARIES),
+                "posted": "",
+                "logo": f"logos/{company.replace(' ', '_')}_logo.png",
+            })),
+            "description": "<h3>Job Description</h3>\n" + PARAGRAPH * rnd.randint(8, 16),
+            "source_mtime": 1_700_000_000.0 + i,
+        }
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_variant(variant: str, n: int) -> dict:
+    gc.collect()
+    before = rss_bytes()
+    t0 = time.perf_counter()
+    if variant == "dict":
+        store = {card["id"]: card for card in synthetic_cards(n)}
+    else:
+        from src.compact_store import CompactJobStore
+        store = CompactJobStore(synthetic_cards(n))
+    build_s = time.perf_counter() - t0
+    gc.collect()
+    after = rss_bytes()
+
+    t0 = time.perf_counter()
+    for i in range(1, n + 1, 97):
+        store.get(str(i))["title"]
+    lookup_us = (time.perf_counter() - t0) / len(range(1, n + 1, 97)) * 1e6
+    return {"variant": variant, "jobs": n, "rss_delta_mb": (after - before) / 2**20,
+            "build_s": build_s, "lookup_us": lookup_us}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--variant", choices=["dict", "compact"])
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.jobs)))
+        return
+
+    results = []
+    for variant in ("dict", "compact"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.job_store_memory", "--jobs", str(args.jobs), "--variant", variant],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout))
+    for r in results:
+        print(f"{r['variant']:>8}: {r['rss_delta_mb']:8.1f} MiB RSS  build {r['build_s']:.2f}s  "
+              f"lookup {r['lookup_us']:.2f}us  ({r['jobs']} jobs)")
+    print(f"reduction: {1 - results[1]['rss_delta_mb'] / results[0]['rss_delta_mb']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# pdf_text.py
+"""
+Resume text extraction benchmark: the previous PyPDF2 page loop vs
+src.pdf_text (serial and page-parallel), over the bundled persona resumes and
+synthetic 20-50 page PDFs.
+
+    python -m benchmarks.pdf_text [--workers 4] [--repeat 3]
+
+The synthetic documents are built with reportlab in a temporary folder. The
+pool only pays off with several cores; on one core keep PDF_TEXT_WORKERS unset
+(the default then skips the pool).
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WORDS = ("data analysis pipeline stakeholder reporting dashboard forecast model python sql "
+         "experiment retention cohort insight workflow platform delivery quality").split()
+
+
+def synthetic_pdf(path: str, pages: int, seed: int) -> None:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    rnd = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=A4)
+    for p in range(pages):
+        y = 800
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(50, y, f"EXPERIENCE {p + 1}")
+        c.setFont("Helvetica", 9.5)
+        while y > 60:
+            y -= 12.5
+            line = " ".join(rnd.choice(WORDS) for _ in range(14))
+            c.drawString(60, y, "\u2022 " + line)
+        c.showPage()
+    c.save()
+
+
+def baseline(path: str) -> str:
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def timed(fn, repeat: int) -> tuple[float, str]:
+    runs, out = [], ""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs), out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", type=int, nargs="+", default=[20, 35, 50])
+    args = parser.parse_args()
+
+    os.environ["PDF_TEXT_WORKERS"] = str(args.workers)
+    from src import pdf_text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = sorted(glob.glob(os.path.join("personas", "*", "resume.pdf")))
+        for i, pages in enumerate(args.pages):
+            path = os.path.join(tmp, f"synthetic_{pages}p.pdf")
+            synthetic_pdf(path, pages, seed=i)
+            docs.append(path)
+
+        # Start the pool before timing; its spawn cost is paid once per worker process.
+        pdf_text.extract_text(docs[-1], max_pages=None, max_chars=None)
+        print(f"backend {pdf_text.default_backend()}, {args.workers} workers, median of {args.repeat}", file=sys.stderr)
+        print(f"{'document':<32}{'pages':>6}{'baseline':>11}{'serial':>10}{'parallel':>10}{'speedup':>9}"
+              f"{'4k chars':>10}{'chars raw/norm':>17}")
+        for path in docs:
+            name = os.path.relpath(path, tmp) if path.startswith(tmp) else os.path.dirname(path)
+            base_s, raw = timed(lambda: baseline(path), args.repeat)
+            serial_s, _ = timed(lambda: pdf_text.extract_text(path, max_pages=None, max_chars=None, parallel=False),
+                                args.repeat)
+            par_s, norm = timed(lambda: pdf_text.extract_text(path, max_pages=None, max_chars=None), args.repeat)
+            capped_s, _ = timed(lambda: pdf_text.extract_text(path, max_pages=None, max_chars=4000), args.repeat)
+            pages = len(pdf_text.BACKENDS["pypdf2"](path))
+            print(f"{name[:31]:<32}{pages:>6}{base_s * 1000:>9.1f}ms{serial_s * 1000:>8.1f}ms{par_s * 1000:>8.1f}ms"
+                  f"{base_s / par_s:>8.2f}x{capped_s * 1000:>8.1f}ms{len(raw):>9}/{len(norm)}")
+    pdf_text.shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# startup.py
+"""
+Startup benchmark for app.py: import time / RSS in a fresh interpreter, and
+per-worker memory under gunicorn with and without preloading.
+
+    python -m benchmarks.startup [--workers 4]
+
+USS (private memory) is what each extra worker really costs; with preload
+the compiled graph, styles and modules live in pages shared with the master.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+IMPORT_PROBE = """
+import json, os, time
+t0 = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t0
+with open("/proc/self/statm") as f:
+    rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+print(json.dumps({"import_s": elapsed, "rss_mb": rss / 2**20}))
+"""
+
+
+def _env(startup: str) -> dict:
+    env = dict(os.environ, APP_STARTUP=startup)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")  # ChatOpenAI() needs a value to construct
+    return env
+
+
+def measure_import(startup: str, repeat: int = 3) -> dict:
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=_env(startup),
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r["import_s"])
+
+
+def _smaps_rollup(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return fields
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_workers(startup: str, workers: int) -> dict:
+    port = _free_port()
+    cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-w", str(workers),
+           "-b", f"127.0.0.1:{port}", "app:app"]
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=_env(startup), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                if time.perf_counter() - t0 > 60:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.05)
+        boot_s = time.perf_counter() - t0
+        time.sleep(1.0)  # let every worker finish booting
+        with open(f"/proc/{proc.pid}/task/{proc.pid}/children") as f:
+            pids = [int(p) for p in f.read().split()]
+        stats = [_smaps_rollup(pid) for pid in pids]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    n = len(stats) or 1
+    return {
+        "boot_s": boot_s,
+        "workers": len(stats),
+        "rss_mb": sum(s.get("Rss", 0) for s in stats) / n,
+        "pss_mb": sum(s.get("Pss", 0) for s in stats) / n,
+        "uss_mb": sum(s.get("Private_Clean", 0) + s.get("Private_Dirty", 0) for s in stats) / n,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--skip-gunicorn", action="store_true")
+    args = parser.parse_args()
+
+    for startup in ("lazy", "preload"):
+        r = measure_import(startup)
+        print(f"import app [{startup:>7}]: {r['import_s'] * 1000:7.1f} ms  RSS {r['rss_mb']:6.1f} MiB")
+    if args.skip_gunicorn:
+        return
+    for startup in ("lazy", "preload"):
+        r = measure_workers(startup, args.workers)
+        print(f"gunicorn   [{startup:>7}]: boot {r['boot_s']:.2f}s  per worker RSS {r['rss_mb']:6.1f} MiB  "
+              f"PSS {r['pss_mb']:6.1f} MiB  USS {r['uss_mb']:6.1f} MiB  ({r['workers']} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# gunicorn.conf.py
+# Production entry point:  gunicorn -c gunicorn.conf.py app:app
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Import app.py once in the master and build the read-only structures there
+# (compiled agent graph, PDF styles, templates, persona index); forked workers
+# share them copy-on-write. Set APP_STARTUP=lazy to boot workers without them.
+preload_app = os.environ.get("APP_STARTUP", "preload") == "preload"
+os.environ.setdefault("APP_STARTUP", "preload" if preload_app else "lazy")
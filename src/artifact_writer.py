@@ -0,0 +1,278 @@
+# artifact_writer.py
+"""
+Write-behind persistence for generated artifacts (tailored Markdown, PDFs,
+change explanations).
+
+    writer = default_writer()
+    future = writer.submit(path, content, candidate="Data Analyst", job="3", kind="pdf")
+    future.result()   # only when the caller needs the file on disk (e.g. to serve it)
+
+Writes go through a background thread. Each file is written to a temp file in
+its target folder and renamed into place, so readers see the old file or the
+new one, never a partial one. Everything queued together is handled as one
+batch: write all temp files, fsync them, rename, then fsync each folder once.
+
+The artifact index (ARTIFACT_INDEX, default `tailored/artifact_index.json`,
+"off" disables it) maps "<candidate>/<job>" to the latest file of each kind.
+It is merged under an flock, so gunicorn workers and bulk render processes
+can share one index.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: index merges are per process only
+    fcntl = None
+
+
+class _Write(NamedTuple):
+    path: str
+    data: bytes
+    candidate: str | None
+    job: str | None
+    kind: str | None
+    future: Future
+
+
+class ArtifactWriter:
+    def __init__(self, index_path: str | None = None, max_pending: int = 256, max_batch: int = 64,
+                 fsync: bool = True):
+        self.index_path = index_path
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self._queue: queue.Queue[_Write] = queue.Queue(maxsize=max_pending)
+        self._pending: dict[str, bytes] = {}    # path -> latest queued content (read-your-writes)
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, dict]] = {}  # used when there is no index file
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self.written = 0
+        self.bytes = 0
+        self.batches = 0
+        self.failures = 0
+
+    # ---- producer side ----
+    def submit(self, path: str, content: bytes | str, candidate: str | None = None, job: str | None = None,
+               kind: str | None = None) -> Future:
+        """Queue `content` for `path`; the returned future resolves to the path once it is on disk."""
+        self._ensure_thread()
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        path = os.path.abspath(path)
+        future: Future = Future()
+        with self._lock:
+            self._pending[path] = data
+        self._queue.put(_Write(path, data, candidate, job, kind, future))  # blocks when max_pending is reached
+        return future
+
+    def read(self, path: str) -> bytes | None:
+        """Latest content for `path`: still-queued bytes first, then the file on disk."""
+        path = os.path.abspath(path)
+        with self._lock:
+            data = self._pending.get(path)
+        if data is not None:
+            return data
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until everything queued so far is on disk."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        marker: Future = Future()
+        self._queue.put(_Write("", b"", None, None, None, marker))
+        marker.result(timeout)
+
+    def artifacts(self, candidate: str, job: str) -> dict[str, dict]:
+        """`{kind: {"path", "bytes", "sha256", "written_at"}}` for one (candidate, job)."""
+        key = f"{candidate}/{job}"
+        if self.index_path:  # the file also holds other processes' writes
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    return json.load(f).get(key, {})
+            except (OSError, ValueError):
+                return {}
+        with self._lock:
+            return dict(self._index.get(key, {}))
+
+    # ---- writer thread ----
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork; a child gets a fresh queue and thread.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pending = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:  # keep the thread alive; callers waiting on futures get the error
+                print(f"Artifact writer batch failed: {e}")
+                for w in batch:
+                    if not w.future.done():
+                        w.future.set_exception(e)
+
+    def _write_batch(self, batch: list[_Write]) -> None:
+        # Only the last write per path matters; earlier ones resolve with it.
+        latest: dict[str, _Write] = {}
+        for w in batch:
+            if w.path:
+                latest[w.path] = w
+        staged, done = [], []
+        for path, w in latest.items():
+            tmp = f"{path}.{os.getpid()}.{next(self._seq)}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    view = memoryview(w.data)
+                    while view:
+                        view = view[os.write(fd, view):]
+                    if self.fsync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+                staged.append((tmp, w))
+            except OSError as e:
+                self._fail(w, e, tmp)
+        folders = set()
+        for tmp, w in staged:
+            try:
+                os.replace(tmp, w.path)
+            except OSError as e:
+                self._fail(w, e, tmp)
+                continue
+            folders.add(os.path.dirname(w.path))
+            done.append((w, time.time()))
+        if self.fsync:
+            for folder in folders:  # make the renames themselves durable, once per folder
+                try:
+                    fd = os.open(folder, os.O_RDONLY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+        if done:
+            try:
+                self._commit_index([(w, t) for w, t in done if w.candidate is not None and w.job is not None])
+            except (OSError, ValueError) as e:  # the files are in place; only their index entries are lost
+                print(f"Artifact index update failed: {e}")
+        with self._lock:
+            self.batches += 1
+            for w, _ in done:
+                self.written += 1
+                self.bytes += len(w.data)
+                if self._pending.get(w.path) is w.data:
+                    del self._pending[w.path]
+        # Superseded writes in this batch share the outcome of the last one for their path.
+        for w in sorted(batch, key=lambda w: w is not latest.get(w.path)):  # last writes first
+            if w.future.done():
+                continue
+            final = latest.get(w.path)
+            error = final.future.exception() if final is not None and final.future.done() else None
+            if error is not None:
+                w.future.set_exception(error)
+            else:
+                w.future.set_result(w.path)
+
+    def _fail(self, w: _Write, error: OSError, tmp: str) -> None:
+        print(f"Artifact write failed for {w.path}: {error}")
+        with self._lock:
+            self.failures += 1
+            if self._pending.get(w.path) is w.data:
+                del self._pending[w.path]
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        w.future.set_exception(error)
+
+    # ---- index ----
+    def _commit_index(self, entries: list[tuple[_Write, float]]) -> None:
+        updates = {}
+        for w, written_at in entries:
+            updates.setdefault(f"{w.candidate}/{w.job}", {})[w.kind or "file"] = {
+                "path": w.path, "bytes": len(w.data),
+                "sha256": hashlib.sha256(w.data).hexdigest(), "written_at": written_at,
+            }
+        if not updates:
+            return
+        if not self.index_path:
+            with self._lock:
+                for key, kinds in updates.items():
+                    self._index.setdefault(key, {}).update(kinds)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        lock_fd = os.open(f"{self.index_path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)  # other processes merge into the same file
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+            for key, kinds in updates.items():
+                index.setdefault(key, {}).update(kinds)
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.index_path)
+        finally:
+            os.close(lock_fd)  # releases the flock
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"written": self.written, "bytes": self.bytes, "batches": self.batches,
+                    "failures": self.failures, "queued": self._queue.qsize(), "pending_paths": len(self._pending)}
+
+
+_default: ArtifactWriter | None = None
+_default_lock = threading.Lock()
+
+
+def default_writer() -> ArtifactWriter:
+    """Process-wide writer, configured from ARTIFACT_INDEX / ARTIFACT_FSYNC (0 disables fsync)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            index = os.environ.get("ARTIFACT_INDEX", os.path.join("tailored", "artifact_index.json"))
+            _default = ArtifactWriter(
+                index_path=None if index == "off" else index,
+                fsync=os.environ.get("ARTIFACT_FSYNC", "1") != "0",
+            )
+            atexit.register(_default.flush, 10)
+        return _default
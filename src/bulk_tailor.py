@@ -0,0 +1,235 @@
+# bulk_tailor.py
+"""
+Offline bulk tailoring: every persona x job under `personas/`, e.g. as a nightly
+job that pre-generates tailored PDFs.
+
+    python -m src.bulk_tailor --personas personas --out-dir tailored_bulk --concurrency 8
+
+LLM-bound graph runs are driven from one asyncio loop (at most `--concurrency`
+in flight); PDF rendering is CPU-bound and goes to a process pool. Progress is
+checkpointed to `<out-dir>/manifest.json` after every item, so an interrupted
+run picks up where it stopped; per-item results and timings are appended to
+`<out-dir>/results.jsonl`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, NamedTuple
+
+from src.artifact_writer import default_writer
+from src.stores import CachedStore, PersonaJobStore, PersonaResumeStore
+
+DONE_STATUSES = ("ok", "clarification")
+
+
+class WorkItem(NamedTuple):
+    persona: str
+    job_id: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.persona}/{self.job_id}"
+
+
+def discover(personas_root: str, only: Iterable[str] = ()) -> list[WorkItem]:
+    """All (persona, job id) pairs, in a stable order."""
+    only = set(only)
+    items = []
+    for persona in sorted(os.listdir(personas_root)):
+        jobs_dir = os.path.join(personas_root, persona, "jobs")
+        if persona.startswith(".") or (only and persona not in only) or not os.path.isdir(jobs_dir):
+            continue
+        ids = [f[3:-len("-card.json")] for f in os.listdir(jobs_dir) if f.startswith("job") and f.endswith("-card.json")]
+        items.extend(WorkItem(persona, job_id) for job_id in sorted(ids, key=lambda i: (len(i), i)))
+    return items
+
+
+# -----------------------------
+# Manifest
+# -----------------------------
+
+class Manifest:
+    """`{item key: {"status", "attempts", "finished_at"}}`, rewritten atomically after every item."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.items: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.items = json.load(f).get("items", {})
+
+    def is_done(self, item: WorkItem, retry_failed: bool) -> bool:
+        status = self.items.get(item.key, {}).get("status")
+        return status in DONE_STATUSES or (status == "failed" and not retry_failed)
+
+    def record(self, item: WorkItem, status: str) -> None:
+        entry = self.items.setdefault(item.key, {"attempts": 0})
+        entry.update(status=status, attempts=entry["attempts"] + 1, finished_at=time.time())
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"items": self.items}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+# -----------------------------
+# Rendering (runs in worker processes)
+# -----------------------------
+
+def render_pdf(tailored_resume: str, out_dir: str, job_id: str, candidate: str | None = None) -> dict:
+    from src.utils import save_resume_as_pdf
+
+    t0 = time.perf_counter()
+    save_resume_as_pdf(tailored_resume, out_dir, job_id, candidate=candidate)
+    path = os.path.join(out_dir, f"updated_resume_job{job_id}.pdf")
+    return {"pdf": path, "bytes": os.path.getsize(path), "render_s": time.perf_counter() - t0}
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+
+class BulkTailor:
+    def __init__(self, agent, personas_root: str, out_dir: str, concurrency: int = 8,
+                 render_workers: int | None = None, explain: bool = True):
+        self.agent = agent
+        self.personas_root = personas_root
+        self.out_dir = out_dir
+        self.concurrency = concurrency
+        self.render_workers = render_workers or os.cpu_count() or 2
+        self.explain = explain
+        self.resume_store = CachedStore(PersonaResumeStore(personas_root), maxsize=256)
+        self._job_stores: dict[str, PersonaJobStore] = {}
+        os.makedirs(out_dir, exist_ok=True)
+        self.manifest = Manifest(os.path.join(out_dir, "manifest.json"))
+        self.results_path = os.path.join(out_dir, "results.jsonl")
+        self.artifacts = default_writer()
+
+    def _job_store(self, persona: str) -> PersonaJobStore:
+        store = self._job_stores.get(persona)
+        if store is None:
+            store = self._job_stores[persona] = PersonaJobStore(os.path.join(self.personas_root, persona))
+        return store
+
+    async def run(self, items: list[WorkItem], retry_failed: bool = False) -> dict:
+        todo = [it for it in items if not self.manifest.is_done(it, retry_failed)]
+        counts = {"total": len(items), "skipped": len(items) - len(todo), "ok": 0, "clarification": 0, "failed": 0}
+        if not todo:
+            return counts
+
+        loop = asyncio.get_running_loop()
+        # Graph nodes are blocking calls executed in the loop's default executor; size it
+        # so `concurrency` runs really are in flight at once.
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency * 2, thread_name_prefix="bulk"))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # spawn: the parent is multi-threaded, and renderers only need reportlab.
+        pool = ProcessPoolExecutor(self.render_workers, mp_context=multiprocessing.get_context("spawn"))
+        t_start = time.perf_counter()
+        try:
+            with open(self.results_path, "a", encoding="utf-8") as out:
+                async def one(item: WorkItem) -> None:
+                    queued = time.perf_counter()
+                    async with semaphore:
+                        record = await self._tailor_one(item, pool, queued)
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    self.manifest.record(item, record["status"])
+                    counts[record["status"]] += 1
+                    print(f"[{sum(counts[s] for s in ('ok', 'clarification', 'failed'))}/{len(todo)}] "
+                          f"{item.key}: {record['status']} ({record['timings']['total_s']:.1f}s)", file=sys.stderr)
+
+                await asyncio.gather(*(one(item) for item in todo))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.artifacts.flush()
+        counts["seconds"] = time.perf_counter() - t_start
+        return counts
+
+    async def _tailor_one(self, item: WorkItem, pool: ProcessPoolExecutor, queued: float) -> dict:
+        from src.resume_agent import ClarificationNeeded
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        timings = {"queue_s": started - queued}
+        record = {"persona": item.persona, "job_id": item.job_id, "status": "ok"}
+        initial = {"job_id": item.job_id, "candidate_id": item.persona, "messages": []}
+        thread_id = f"bulk__{item.persona}__job-{item.job_id}"
+        job_store = self._job_store(item.persona)
+        try:
+            final_state = await self.agent.arun(initial, thread_id, job_store=job_store, resume_store=self.resume_store)
+            timings["graph_s"] = time.perf_counter() - started
+            tailored = final_state.get("tailored_resume") or ""
+            if not tailored:
+                raise ValueError("empty tailored resume")
+            persona_out = os.path.join(self.out_dir, item.persona)
+            t0 = time.perf_counter()
+            rendered = await loop.run_in_executor(pool, render_pdf, tailored, persona_out, item.job_id, item.persona)
+            timings["render_s"] = rendered.pop("render_s")
+            timings["render_wait_s"] = time.perf_counter() - t0 - timings["render_s"]  # pool queue / startup
+            record.update(rendered, words=len(tailored.split()))
+            if self.explain:
+                from src.explain import explain_changes
+
+                t0 = time.perf_counter()
+                explanation = explain_changes(
+                    self.resume_store.get(item.persona), tailored, job_store.get(item.job_id, None)
+                )
+                self.artifacts.submit(os.path.join(persona_out, f"updated_resume_job{item.job_id}_explanation.txt"),
+                                      explanation.to_text(), candidate=item.persona, job=item.job_id, kind="explanation")
+                record["keyword_coverage"] = round(explanation.keywords["coverage"], 3)
+                timings["explain_s"] = time.perf_counter() - t0
+        except ClarificationNeeded as e:
+            record.update(status="clarification", question=e.question)
+        except Exception as e:
+            record.update(status="failed", error=f"{type(e).__name__}: {e}")
+        timings["total_s"] = time.perf_counter() - started
+        record["timings"] = {k: round(v, 4) for k, v in timings.items()}
+        record["finished_at"] = time.time()
+        return record
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Tailor every persona's resume to every one of its jobs.")
+    parser.add_argument("--personas", default="personas", help="root folder containing persona directories")
+    parser.add_argument("--out-dir", default="tailored_bulk", help="where PDFs, manifest.json and results.jsonl go")
+    parser.add_argument("--persona", action="append", default=[], help="only this persona (repeatable)")
+    parser.add_argument("--limit", type=int, default=None, help="process at most this many pending items")
+    parser.add_argument("--concurrency", type=int, default=8, help="tailoring runs in flight")
+    parser.add_argument("--render-workers", type=int, default=None, help="PDF render processes (default: CPU count)")
+    parser.add_argument("--tailor-mode", choices=("single", "sections"), default=None)
+    parser.add_argument("--retry-failed", action="store_true", help="retry items that failed in earlier runs")
+    parser.add_argument("--no-explain", action="store_true", help="skip the change explanation files")
+    parser.add_argument("--dry-run", action="store_true", help="list pending items and exit")
+    args = parser.parse_args(argv)
+    # Index this run's artifacts next to them (render processes inherit the setting).
+    os.environ.setdefault("ARTIFACT_INDEX", os.path.join(args.out_dir, "artifact_index.json"))
+
+    items = discover(args.personas, args.persona)
+    manifest = Manifest(os.path.join(args.out_dir, "manifest.json"))
+    pending = [it for it in items if not manifest.is_done(it, args.retry_failed)]
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    if args.dry_run:
+        for it in pending:
+            print(it.key)
+        print(f"{len(pending)} pending of {len(items)}", file=sys.stderr)
+        return 0
+
+    from src.resume_agent import ResumeTailorAgent
+
+    agent = ResumeTailorAgent(save_dir=os.path.join(args.out_dir, "_markdown"), tailor_mode=args.tailor_mode)
+    bulk = BulkTailor(agent, args.personas, args.out_dir, concurrency=args.concurrency,
+                      render_workers=args.render_workers, explain=not args.no_explain)
+    counts = asyncio.run(bulk.run(pending, retry_failed=args.retry_failed))
+    print(json.dumps(counts))
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
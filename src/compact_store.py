@@ -0,0 +1,171 @@
+# compact_store.py
+from __future__ import annotations
+
+import mmap
+import sys
+import tempfile
+import threading
+from typing import Iterable, Iterator
+
+
+# -----------------------------
+# Job record
+# -----------------------------
+
+# Short, highly repeated card fields: one shared str object per distinct value.
+_INTERNED_FIELDS = ("company", "location", "tag", "type", "salary", "posted", "logo")
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class JobRecord:
+    """
+    Slotted job card. The long HTML description is not held in memory; it lives
+    in the store's memory-mapped blob file and is decoded on attribute access.
+    Supports `job.get(key)` / `job[key]` so dict-based callers keep working.
+    """
+    __slots__ = (
+        "id", "title", "company", "location", "tag", "type", "salary", "posted", "logo",
+        "url", "benefits", "summary", "source_mtime", "extra", "_store", "_desc_off", "_desc_len",
+    )
+
+    FIELDS = ("id", "title", "company", "location", "tag", "type", "salary", "posted", "logo",
+              "url", "benefits", "summary", "source_mtime")
+
+    def __init__(self, card: dict, store: "CompactJobStore", desc_off: int, desc_len: int):
+        for name in self.FIELDS:
+            value = card.get(name)
+            if name in _INTERNED_FIELDS:
+                value = _intern(value)
+            elif name == "summary" and isinstance(value, list):
+                value = tuple(value)
+            setattr(self, name, value)
+        extra = {k: v for k, v in card.items() if k not in self.FIELDS and k != "description"}
+        self.extra = extra or None
+        self._store = store
+        self._desc_off = desc_off
+        self._desc_len = desc_len
+
+    @property
+    def description(self) -> str:
+        return self._store._read_blob(self._desc_off, self._desc_len)
+
+    def get(self, key: str, default=None):
+        if key in self.FIELDS or key == "description":
+            value = getattr(self, key)
+            return default if value is None else value
+        return (self.extra or {}).get(key, default)
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def to_dict(self) -> dict:
+        """Materialise a plain card dict (including the description)."""
+        card = {name: getattr(self, name) for name in self.FIELDS if getattr(self, name) is not None}
+        if isinstance(card.get("summary"), tuple):
+            card["summary"] = list(card["summary"])
+        card.update(self.extra or {})
+        card["description"] = self.description
+        return card
+
+    def __repr__(self) -> str:
+        return f"JobRecord(id={self.id!r}, title={self.title!r})"
+
+
+_MISSING = object()
+
+
+# -----------------------------
+# Store
+# -----------------------------
+
+class CompactJobStore:
+    """
+    Memory-lean replacement for `{job["id"]: job}` dicts of full card dicts.
+
+    - O(1) lookup by id (`get`, `in`, iteration in insertion order).
+    - Repeated short fields are interned across all records.
+    - Descriptions are appended to a blob file (anonymous temp file unless
+      `blob_path` is given) and read back through `mmap` only when needed.
+    """
+
+    def __init__(self, jobs: Iterable[dict] = (), blob_path: str | None = None):
+        self._records: dict[str, JobRecord] = {}
+        self._lock = threading.Lock()
+        if blob_path:
+            self._blob = open(blob_path, "w+b")
+        else:
+            self._blob = tempfile.TemporaryFile(prefix="jobs-", suffix=".blob")
+        self._blob_size = 0
+        self._map: mmap.mmap | None = None
+        self.extend(jobs)
+
+    # ---- writes ----
+
+    def add(self, card: dict) -> JobRecord:
+        desc = (card.get("description") or "").encode("utf-8")
+        with self._lock:
+            off = self._blob_size
+            self._blob.seek(off)
+            self._blob.write(desc)
+            self._blob_size += len(desc)
+            rec = JobRecord(card, self, off, len(desc))
+            self._records[sys.intern(str(rec.id))] = rec
+        return rec
+
+    def extend(self, cards: Iterable[dict]) -> None:
+        for card in cards:
+            self.add(card)
+        self._blob.flush()
+
+    # ---- reads ----
+
+    def _read_blob(self, off: int, length: int) -> str:
+        if length == 0:
+            return ""
+        m = self._map
+        if m is None or off + length > len(m):
+            with self._lock:
+                self._blob.flush()
+                if self._map is None or off + length > len(self._map):
+                    # Old maps are not closed here: concurrent readers may still hold
+                    # them, and they are released once the last reference goes away.
+                    self._map = mmap.mmap(self._blob.fileno(), self._blob_size, access=mmap.ACCESS_READ)
+                m = self._map
+        return m[off:off + length].decode("utf-8")
+
+    def get(self, job_id, default=None) -> JobRecord | None:
+        return self._records.get(str(job_id), default)
+
+    def __getitem__(self, job_id) -> JobRecord:
+        return self._records[str(job_id)]
+
+    def __contains__(self, job_id) -> bool:
+        return str(job_id) in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def values(self) -> Iterable[JobRecord]:
+        return self._records.values()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._blob.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,317 @@
+# explain.py
+"""
+Local change explanations for tailored resumes.
+
+Aligns the original resume text (as extracted from `resume.pdf`) with the
+tailored Markdown at section and item (bullet / sentence / skill) level using
+difflib, and reports what was added, removed and reworded together with the
+job-keyword coverage before and after. Runs in milliseconds, no LLM call.
+"""
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from typing import Any
+
+from src.page_fit import job_keywords
+
+# Similarity (difflib ratio over word tokens) above which items are the same / a rewording.
+SAME_RATIO = 0.9
+REWORD_RATIO = 0.5
+
+# Canonical section names, matched by substring against headings of either document.
+_SECTION_ALIASES = (
+    ("SUMMARY", ("SUMMARY", "PROFILE", "OBJECTIVE", "ABOUT")),
+    ("SKILLS", ("SKILL", "COMPETENC", "TECHNOLOG")),
+    ("EXPERIENCE", ("EXPERIENCE", "EMPLOYMENT", "WORK HISTORY", "CAREER")),
+    ("PROJECTS", ("PROJECT",)),
+    ("EDUCATION", ("EDUCATION", "QUALIFICATION", "ACADEMIC")),
+    ("CERTIFICATIONS", ("CERTIF", "LICEN", "COURSE")),
+    ("ACHIEVEMENTS", ("ACHIEVEMENT", "AWARD", "ACCOMPLISHMENT")),
+)
+_BULLETS = "\u2022\u25cf\u25aa\u25e6\u2023\u2043\x7f\uf0b7\uf0a7"  # PDF extraction often yields private-use / DEL glyphs for bullets
+_BULLET_SPLIT = re.compile(rf"[{_BULLETS}]|(?:^|\s)[-*]\s")
+_SKILL_SPLIT = re.compile(r"[,;|·](?![^()]*\))")  # not inside "Python (pandas, NumPy)"
+_WORD = re.compile(r"[a-z0-9+#]+(?:[.\-][a-z0-9+#]+)*")
+
+
+def canonical_section(heading: str) -> str:
+    name = re.sub(r"[^A-Z ]", "", heading.upper()).strip()
+    for canonical, needles in _SECTION_ALIASES:
+        if any(n in name for n in needles):
+            return canonical
+    return name or "HEADER"
+
+
+def _plain(markup: str) -> str:
+    text = re.sub(r"<[^>]+>|[\x00-\x1f\x7f\ue000-\uf8ff]", " ", markup)
+    text = re.sub(r"[*_`#]+", "", html.unescape(text))
+    return re.sub(r"\s+", " ", text).strip(" -–—|")
+
+
+def _tokens(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def _stem(word: str) -> str:
+    """Plural-insensitive form for keyword matching ("employees" ~ "employee")."""
+    return word[:-1] if len(word) > 4 and word.endswith("s") and not word.endswith("ss") else word
+
+
+# -----------------------------
+# Parsing both sides into (section, item) lists
+# -----------------------------
+
+@dataclass
+class Item:
+    section: str
+    text: str
+    tokens: list[str] = field(repr=False, default_factory=list)
+
+    def __post_init__(self):
+        self.tokens = self.tokens or _tokens(self.text)
+
+
+def _split_items(section: str, body: str) -> list[str]:
+    if section == "SKILLS":
+        parts = _SKILL_SPLIT.split(re.sub(r"\b[\w/& ]{2,30}:\s", ",", body))
+    elif _BULLET_SPLIT.search(body):
+        parts = _BULLET_SPLIT.split(body)
+    else:
+        parts = re.split(r"(?<=[.!?])\s+(?=[A-Z])", body)
+    return [p for p in (_plain(p) for p in parts) if len(_tokens(p)) >= 1]
+
+
+def _looks_like_heading(line: str) -> bool:
+    letters = [c for c in line if c.isalpha()]
+    return (
+        3 <= len(letters) <= 40 and len(line.split()) <= 5
+        and sum(c.isupper() for c in letters) / len(letters) > 0.8
+    )
+
+
+def parse_original(text: str) -> list[Item]:
+    """Items of a resume extracted from PDF: ALL-CAPS lines start sections; wrapped lines are rejoined."""
+    sections: list[tuple[str, list[str]]] = [("HEADER", [])]
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _looks_like_heading(line):
+            sections.append((canonical_section(line), []))
+        else:
+            sections[-1][1].append(line)
+
+    items = []
+    for section, lines in sections:
+        if section == "EXPERIENCE":
+            # Role lines ("Title | Company | dates") stay separate; bullets wrap across lines.
+            blocks, current = [], []
+            for line in lines:
+                if "|" in line and not _BULLET_SPLIT.search(line):
+                    if current:
+                        blocks.append(" ".join(current))
+                    blocks.append(line)
+                    current = []
+                else:
+                    current.append(line)
+            if current:
+                blocks.append(" ".join(current))
+            for block in blocks:
+                items.extend(Item(section, t) for t in _split_items(section, block))
+        elif section == "HEADER":
+            items.extend(Item(section, t) for line in lines for t in _split_items(section, line))
+        else:
+            items.extend(Item(section, t) for t in _split_items(section, " ".join(lines)))
+    return items
+
+
+def parse_tailored(markdown: str) -> list[Item]:
+    """Items of the tailored Markdown: `## ` starts a section, each bullet / line is an item."""
+    section = "HEADER"
+    items = []
+    for line in (markdown or "").splitlines():
+        line = line.strip()
+        if not line or line.lower() in ("<hr>", "<hr/>", "<hr />"):
+            continue
+        if line.startswith("#"):
+            if line.startswith("## "):
+                section = canonical_section(line[3:])
+                continue
+            line = line.lstrip("# ")
+        if line.startswith(("- ", "* ")):
+            line = line[2:]
+        for part in re.split(r"<br\s*/?>", line):
+            items.extend(Item(section, t) for t in _split_items(section, part))
+    return items
+
+
+# -----------------------------
+# Alignment
+# -----------------------------
+
+@dataclass
+class Change:
+    kind: str                 # "added" | "removed" | "reworded" | "moved"
+    section: str
+    text: str
+    original: str | None = None
+    original_section: str | None = None
+    similarity: float | None = None
+
+
+@dataclass
+class Explanation:
+    changes: list[Change]
+    unchanged: int
+    keywords: dict[str, Any]
+    sections: dict[str, dict[str, int]]
+
+    def by_kind(self, kind: str) -> list[Change]:
+        return [c for c in self.changes if c.kind == kind]
+
+    def to_dict(self) -> dict:
+        return {
+            "added": [asdict(c) for c in self.by_kind("added")],
+            "removed": [asdict(c) for c in self.by_kind("removed")],
+            "reworded": [asdict(c) for c in self.by_kind("reworded")],
+            "moved": [asdict(c) for c in self.by_kind("moved")],
+            "unchanged": self.unchanged,
+            "sections": self.sections,
+            "keywords": self.keywords,
+        }
+
+    def to_text(self) -> str:
+        """Plain-text report in the spirit of the `*_explanation.txt` files."""
+        kw = self.keywords
+        lines = [
+            f"Job keyword coverage: {kw['original_coverage']:.0%} -> {kw['coverage']:.0%}"
+            f" ({len(kw['covered'])}/{len(kw['keywords'])})",
+        ]
+        if kw["newly_covered"]:
+            lines.append("Newly covered: " + ", ".join(kw["newly_covered"]))
+        if kw["missing"]:
+            lines.append("Still missing: " + ", ".join(kw["missing"]))
+        for kind, title in (("added", "Added"), ("reworded", "Reworded"), ("moved", "Moved"), ("removed", "Removed")):
+            changes = self.by_kind(kind)
+            if not changes:
+                continue
+            lines.append("")
+            lines.append(f"{title} ({len(changes)}):")
+            for c in changes:
+                where = c.section if kind != "moved" else f"{c.original_section} -> {c.section}"
+                lines.append(f"- [{where}] {c.text}")
+                if kind == "reworded":
+                    lines.append(f"    was: {c.original}")
+        return "\n".join(lines) + "\n"
+
+
+def _align(original: list[Item], tailored: list[Item]) -> list[tuple[int, int, float]]:
+    """Greedy one-to-one matching by descending similarity (same-section pairs win ties)."""
+    matcher = SequenceMatcher(autojunk=False)
+    candidates = []
+    for j, t in enumerate(tailored):
+        if not t.tokens:
+            continue
+        matcher.set_seq2(t.tokens)
+        t_set = set(t.tokens)
+        for i, o in enumerate(original):
+            if not o.tokens or not t_set.intersection(o.tokens):
+                continue
+            matcher.set_seq1(o.tokens)
+            if matcher.real_quick_ratio() < REWORD_RATIO or matcher.quick_ratio() < REWORD_RATIO:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= REWORD_RATIO:
+                candidates.append((ratio, o.section == t.section, i, j))
+    candidates.sort(key=lambda c: (-c[0], not c[1], c[2], c[3]))
+
+    used_o, used_t, pairs = set(), set(), []
+    for ratio, _, i, j in candidates:
+        if i in used_o or j in used_t:
+            continue
+        used_o.add(i)
+        used_t.add(j)
+        pairs.append((i, j, ratio))
+    return pairs
+
+
+def keyword_coverage(job: Any, original: str, tailored: str, limit: int = 25) -> dict[str, Any]:
+    """Coverage of the job card's `tag` terms plus the top description terms, before and after."""
+    get = job.get if hasattr(job, "get") else (lambda k, d=None: d)
+    tags = [t.strip().lower() for t in re.split(r"[,;/]", get("tag") or "") if t.strip()]
+    description = get("description") or ""
+    if isinstance(description, list):
+        description = " ".join(description)
+    # Responsibilities/requirements are list items in the HTML descriptions; the prose
+    # around them is mostly company boilerplate.
+    listed = re.findall(r"<li[^>]*>(.*?)</li>", description, flags=re.S | re.I)
+    if len(listed) >= 3:
+        description = " ".join(listed)
+    skip = set(_tokens(f"{get('company') or ''} {get('location') or ''}")) | _GENERIC
+    terms = [k for k in job_keywords(description, limit * 2) if k not in skip and not k.isdigit()]
+    keywords = list(dict.fromkeys(tags + terms))[:max(limit, len(tags))]
+
+    def normal(text: str) -> str:
+        return " " + " ".join(_stem(w) for w in _tokens(text)) + " "
+
+    def present(text: str) -> set[str]:
+        low = normal(text)
+        return {k for k in keywords if normal(k) in low}
+
+    before, after = present(original), present(tailored)
+    n = len(keywords) or 1
+    return {
+        "keywords": keywords,
+        "covered": [k for k in keywords if k in after],
+        "missing": [k for k in keywords if k not in after],
+        "newly_covered": [k for k in keywords if k in after and k not in before],
+        "dropped": [k for k in keywords if k in before and k not in after],
+        "original_coverage": len(before) / n,
+        "coverage": len(after) / n,
+    }
+
+
+_GENERIC = frozenset("""
+ensure support provide manage lead drive help make key role responsibilities requirements
+description company apply candidate ideal seeking opportunity day based level plus
+how many much best following through between both against after ahead alongside among
+additional related similar highly clearly effectively well-being daily weekly annually annual
+days weeks leave paid free bonus benefits convenient anywhere career growing looking join
+""".split())
+
+
+def explain_changes(original_text: str, tailored_markdown: str, job: Any = None) -> Explanation:
+    """Structured diff between the original resume text and the tailored Markdown."""
+    original = parse_original(original_text)
+    tailored = parse_tailored(tailored_markdown)
+    pairs = _align(original, tailored)
+
+    changes, unchanged = [], 0
+    matched_o = {i for i, _, _ in pairs}
+    matched_t = {j: (i, ratio) for i, j, ratio in pairs}
+    for j, t in enumerate(tailored):
+        if j not in matched_t:
+            changes.append(Change("added", t.section, t.text))
+            continue
+        i, ratio = matched_t[j]
+        o = original[i]
+        if ratio < SAME_RATIO:
+            changes.append(Change("reworded", t.section, t.text, o.text, o.section, round(ratio, 3)))
+        elif o.section != t.section and "HEADER" not in (o.section, t.section):
+            changes.append(Change("moved", t.section, t.text, o.text, o.section, round(ratio, 3)))
+        else:
+            unchanged += 1
+    for i, o in enumerate(original):
+        if i not in matched_o:
+            changes.append(Change("removed", o.section, o.text))
+
+    sections: dict[str, dict[str, int]] = {}
+    for c in changes:
+        counts = sections.setdefault(c.section, {"added": 0, "removed": 0, "reworded": 0, "moved": 0})
+        counts[c.kind] += 1
+
+    keywords = keyword_coverage(job or {}, original_text, tailored_markdown)
+    return Explanation(changes, unchanged, keywords, sections)
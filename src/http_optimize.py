@@ -0,0 +1,189 @@
+# http_optimize.py
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import Flask, Response, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:  # optional: Brotli (br) encoding
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+}
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _is_compressible(mimetype: str | None) -> bool:
+    return (mimetype or "").split(";")[0].strip() in COMPRESSIBLE_TYPES
+
+
+def _compress(data: bytes, encoding: str, static: bool) -> bytes:
+    # Static assets are compressed once and cached, so spend the CPU on max ratio;
+    # dynamic bodies are compressed per response, so use cheaper levels.
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 5)
+    return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+
+
+def _preferred_encodings() -> list[str]:
+    accepted = request.accept_encodings
+    order = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return [enc for enc in order if accepted[enc]]
+
+
+class _StaticAsset:
+    __slots__ = ("path", "mtime", "digest", "mimetype", "data", "encodings")
+
+    def __init__(self, path: str, mtime: float):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.path = path
+        self.mtime = mtime
+        self.digest = hashlib.blake2b(self.data, digest_size=8).hexdigest()
+        self.mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.encodings: dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self.encodings.get(encoding)
+        if body is None:
+            # Honour a build-time sibling (style.css.br / style.css.gz) if it is fresh.
+            sibling = self.path + (".br" if encoding == "br" else ".gz")
+            if os.path.exists(sibling) and os.path.getmtime(sibling) >= self.mtime:
+                with open(sibling, "rb") as f:
+                    body = f.read()
+            else:
+                body = _compress(self.data, encoding, static=True)
+            self.encodings[encoding] = body
+        return body
+
+
+class ResponseOptimizer:
+    """
+    Response-optimisation middleware for the Flask app.
+
+    - `url_for('static', ...)` gets a `?v=<content hash>` so asset URLs change
+      whenever the file does; versioned requests are served with a far-future
+      `Cache-Control: immutable`.
+    - Static text assets are compressed once (gzip/br) and served from memory.
+    - Dynamic text responses are compressed on the fly.
+    - Every buffered response gets an ETag and honours If-None-Match / 304.
+    """
+
+    def __init__(self, app: Flask | None = None, min_size: int = 512):
+        self.min_size = min_size
+        self._assets: dict[str, _StaticAsset] = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        self.app = app
+        app.url_defaults(self._add_static_version)
+        app.view_functions["static"] = self.serve_static
+        app.after_request(self.optimize_response)
+
+    # -------------------------
+    # Static assets
+    # -------------------------
+
+    def _asset(self, filename: str) -> _StaticAsset | None:
+        path = safe_join(self.app.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        mtime = os.path.getmtime(path)
+        asset = self._assets.get(path)
+        if asset is None or asset.mtime != mtime:
+            asset = _StaticAsset(path, mtime)
+            with self._lock:
+                self._assets[path] = asset
+        return asset
+
+    def _add_static_version(self, endpoint: str, values: dict) -> None:
+        if endpoint != "static" or "v" in values:
+            return
+        asset = self._asset(values.get("filename", ""))
+        if asset is not None:
+            values["v"] = asset.digest
+
+    def serve_static(self, filename: str) -> Response:
+        asset = self._asset(filename)
+        if asset is None:
+            raise NotFound()
+        if not _is_compressible(asset.mimetype) or request.range is not None:
+            # Binary assets / range requests: let Werkzeug stream the file.
+            resp = self.app.send_static_file(filename)
+        else:
+            encoding = next(iter(_preferred_encodings()), None)
+            body = asset.encoded(encoding) if encoding else asset.data
+            resp = Response(body, mimetype=asset.mimetype)
+            resp.vary.add("Accept-Encoding")
+            if encoding:
+                resp.content_encoding = encoding
+            resp.set_etag(f"{asset.digest}-{encoding}" if encoding else asset.digest)
+            resp.last_modified = asset.mtime
+            resp.make_conditional(request)
+
+        if request.args.get("v") == asset.digest:
+            resp.cache_control.no_cache = None
+            resp.cache_control.public = True
+            resp.cache_control.max_age = ONE_YEAR
+            resp.cache_control.immutable = True
+        else:
+            resp.cache_control.no_cache = True
+        return resp
+
+    # -------------------------
+    # Dynamic responses
+    # -------------------------
+
+    def optimize_response(self, resp: Response) -> Response:
+        if (
+            request.endpoint == "static"
+            or resp.direct_passthrough
+            or resp.is_streamed
+            or resp.status_code != 200
+            or request.method not in ("GET", "HEAD", "POST")
+        ):
+            return resp
+
+        cacheable = request.method in ("GET", "HEAD")
+        if resp.content_encoding:
+            # Already encoded (pre-compressed fragment); only conditional handling applies.
+            if cacheable and resp.get_etag()[0]:
+                resp.make_conditional(request)
+            return resp
+
+        data = resp.get_data()
+        encoding = None
+        if _is_compressible(resp.mimetype) and len(data) >= self.min_size:
+            encoding = next(iter(_preferred_encodings()), None)
+            resp.vary.add("Accept-Encoding")
+
+        if cacheable:
+            etag = resp.get_etag()[0]
+            if etag is None:
+                etag = hashlib.blake2b(data, digest_size=12).hexdigest()
+                etag = f"{etag}-{encoding}" if encoding else etag
+                resp.set_etag(etag)
+            if request.if_none_match.contains(etag):
+                # Skip compression entirely: the client already has this representation.
+                resp.make_conditional(request)
+                return resp
+            if resp.cache_control.no_cache is None and resp.cache_control.max_age is None:
+                resp.cache_control.no_cache = True
+
+        if encoding:
+            resp.set_data(_compress(data, encoding, static=False))
+            resp.content_encoding = encoding
+        return resp
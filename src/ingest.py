@@ -0,0 +1,285 @@
+# ingest.py
+"""
+Offline persona ingestion: scan `personas/<name>/` folders in parallel, validate
+job cards, extract resume text and write one versioned SQLite snapshot that the
+web app opens read-only at startup.
+
+    python -m src.ingest --personas personas --out personas.snapshot.sqlite
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT = "personas.snapshot.sqlite"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE personas (
+    name        TEXT PRIMARY KEY,
+    resume_text TEXT NOT NULL,
+    resume_sha  TEXT NOT NULL,
+    jobs_count  INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE jobs (
+    persona      TEXT NOT NULL,
+    id           TEXT NOT NULL,
+    ord          INTEGER NOT NULL,
+    card_json    TEXT NOT NULL,
+    description  TEXT NOT NULL,
+    source_mtime REAL NOT NULL,
+    PRIMARY KEY (persona, id)
+) WITHOUT ROWID;
+"""
+
+# -----------------------------
+# Card schema
+# -----------------------------
+
+_REQUIRED = {"id": str, "title": str}
+_OPTIONAL = {
+    "company": str, "tag": str, "location": str, "type": str, "benefits": str,
+    "salary": str, "posted": str, "logo": str, "url": str, "summary": list,
+}
+
+
+def validate_card(card: dict) -> list[str]:
+    """Return a list of schema problems for a job card (empty if valid)."""
+    if not isinstance(card, dict):
+        return ["card is not a JSON object"]
+    errors = []
+    for key, typ in _REQUIRED.items():
+        if not isinstance(card.get(key), typ) or not card.get(key):
+            errors.append(f"missing or invalid '{key}'")
+    for key, typ in _OPTIONAL.items():
+        if key in card and card[key] is not None and not isinstance(card[key], typ):
+            errors.append(f"'{key}' should be {typ.__name__}")
+    if isinstance(card.get("summary"), list) and not all(isinstance(s, str) for s in card["summary"]):
+        errors.append("'summary' should be a list of strings")
+    return errors
+
+
+# -----------------------------
+# Scanning (runs in worker processes)
+# -----------------------------
+
+def scan_persona(personas_root: str, persona: str) -> dict:
+    from src.utils import load_job_card, read_resume_text
+
+    persona_dir = os.path.join(personas_root, persona)
+    jobs_dir = os.path.join(persona_dir, "jobs")
+    jobs, errors = [], []
+    if os.path.isdir(jobs_dir):
+        for fname in sorted(os.listdir(jobs_dir)):
+            if not (fname.startswith("job") and fname.endswith("-card.json")):
+                continue
+            try:
+                card = load_job_card(jobs_dir, fname)
+            except Exception as e:
+                errors.append(f"{persona}/jobs/{fname}: {e}")
+                continue
+            problems = validate_card(card)
+            if problems:
+                errors.append(f"{persona}/jobs/{fname}: " + "; ".join(problems))
+                continue
+            jobs.append(card)
+
+    resume_text = read_resume_text(os.path.join(persona_dir, "resume.pdf"))
+    return {"persona": persona, "jobs": jobs, "resume_text": resume_text, "errors": errors}
+
+
+# -----------------------------
+# Snapshot writer
+# -----------------------------
+
+def build_snapshot(personas_root: str, out_path: str, workers: int | None = None, strict: bool = False) -> dict:
+    from concurrent.futures import ProcessPoolExecutor
+
+    personas = sorted(
+        d for d in os.listdir(personas_root)
+        if os.path.isdir(os.path.join(personas_root, d)) and not d.startswith(".")
+    )
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(scan_persona, [personas_root] * len(personas), personas))
+
+    errors = [e for r in results for e in r["errors"]]
+    if strict and errors:
+        raise ValueError("Invalid persona data:\n" + "\n".join(errors))
+
+    # Build next to the target and rename, so the app never opens a half-written file.
+    tmp_path = f"{out_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + _SCHEMA)
+        with conn:
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(SNAPSHOT_VERSION)),
+                ("built_at", str(int(time.time()))),
+                ("personas_root", os.path.abspath(personas_root)),
+            ])
+            for r in results:
+                resume = r["resume_text"]
+                conn.execute("INSERT INTO personas VALUES (?, ?, ?, ?)", (
+                    r["persona"], resume, hashlib.sha256(resume.encode("utf-8")).hexdigest(), len(r["jobs"]),
+                ))
+                conn.executemany("INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?)", [
+                    (
+                        r["persona"], card["id"], i,
+                        json.dumps({k: v for k, v in card.items() if k not in ("description", "source_mtime")},
+                                   ensure_ascii=False),
+                        card["description"], card["source_mtime"],
+                    )
+                    for i, card in enumerate(r["jobs"])
+                ])
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+
+    return {
+        "personas": len(results),
+        "jobs": sum(len(r["jobs"]) for r in results),
+        "errors": errors,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# -----------------------------
+# Read-only snapshot (runtime)
+# -----------------------------
+
+class PersonaSnapshot:
+    """
+    Read-only view over a snapshot file. Opening it does no per-persona work, so
+    startup cost does not grow with the corpus; each search is a single indexed
+    query for one persona. Connections are per thread.
+    """
+
+    def __init__(self, path: str, personas_root: str = "personas"):
+        self.path = os.path.abspath(path)
+        self.personas_root = personas_root
+        self._local = threading.local()
+        self.built_at = os.stat(self.path).st_mtime  # sources edited after this are read live
+        version = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: unsupported snapshot version {version and version[0]!r}")
+
+    @classmethod
+    def open_default(cls, personas_root: str = "personas") -> "PersonaSnapshot | None":
+        """Open `$PERSONA_SNAPSHOT` (or ./personas.snapshot.sqlite) if it exists."""
+        path = os.environ.get("PERSONA_SNAPSHOT", DEFAULT_SNAPSHOT)
+        if not os.path.exists(path):
+            return None
+        return cls(path, personas_root)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection must never cross a fork (gunicorn --preload opens one in the master).
+        if conn is None or self._local.pid != os.getpid():
+            # immutable=1: no locking or change detection; the file is replaced, never edited.
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA mmap_size = 1073741824")  # read pages straight from the page cache
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def personas(self) -> list[str]:
+        return [row[0] for row in self._conn().execute("SELECT name FROM personas ORDER BY name")]
+
+    def jobs_many(self, persona: str, job_ids: list[str]) -> dict[str, dict]:
+        if not job_ids:
+            return {}
+        marks = ",".join("?" * len(job_ids))
+        found = {}
+        for job_id, card_json, description, mtime in self._conn().execute(
+            f"SELECT id, card_json, description, source_mtime FROM jobs WHERE persona = ? AND id IN ({marks})",
+            (persona, *job_ids),
+        ):
+            card = json.loads(card_json)
+            card["description"] = description
+            card["source_mtime"] = mtime
+            found[job_id] = card
+        return found
+
+    def resumes_many(self, personas: list[str]) -> dict[str, str]:
+        if not personas:
+            return {}
+        marks = ",".join("?" * len(personas))
+        return dict(self._conn().execute(
+            f"SELECT name, resume_text FROM personas WHERE name IN ({marks})", personas
+        ))
+
+    def _changed_since_build(self, persona_dir: str) -> bool:
+        """True when resume.pdf, jobs/ or a file in it is newer than the snapshot."""
+        jobs_dir = os.path.join(persona_dir, "jobs")
+        try:
+            paths = [os.path.join(persona_dir, "resume.pdf"), jobs_dir]
+            paths += [entry.path for entry in os.scandir(jobs_dir)]
+        except OSError:
+            pass
+        for path in paths:
+            try:
+                if os.stat(path).st_mtime > self.built_at:
+                    return True
+            except OSError:
+                continue
+        return False
+
+    def load_persona(self, persona: str) -> (list[dict], str, str):
+        """
+        Same contract as `utils.load_jobs_from_persona_folder`. Personas added
+        or edited after the snapshot was built are scanned from their folder
+        instead, so watcher invalidations take effect before the next rebuild.
+        """
+        conn = self._conn()
+        persona_dir = os.path.join(self.personas_root, persona)
+        row = conn.execute("SELECT resume_text FROM personas WHERE name = ?", (persona,)).fetchone()
+        if row is None or self._changed_since_build(persona_dir):
+            if not os.path.isdir(persona_dir):
+                return [], "", persona_dir
+            scanned = scan_persona(self.personas_root, persona)
+            for error in scanned["errors"]:
+                print(f"Skipping invalid job card {error}")
+            return scanned["jobs"], scanned["resume_text"], persona_dir
+        jobs = []
+        for card_json, description, mtime in conn.execute(
+            "SELECT card_json, description, source_mtime FROM jobs WHERE persona = ? ORDER BY ord", (persona,)
+        ):
+            card = json.loads(card_json)
+            card["description"] = description
+            card["source_mtime"] = mtime
+            jobs.append(card)
+        return jobs, row[0], persona_dir
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a read-only persona snapshot for the web app.")
+    parser.add_argument("--personas", default="personas", help="root folder containing persona directories")
+    parser.add_argument("--out", default=DEFAULT_SNAPSHOT, help="snapshot file to write")
+    parser.add_argument("--workers", type=int, default=None, help="scanner processes (default: CPU count)")
+    parser.add_argument("--strict", action="store_true", help="fail instead of skipping invalid cards")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = build_snapshot(args.personas, args.out, workers=args.workers, strict=args.strict)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for err in stats["errors"]:
+        print(f"skipped: {err}", file=sys.stderr)
+    print(f"Wrote {args.out}: {stats['personas']} personas, {stats['jobs']} jobs in {stats['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
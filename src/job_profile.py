@@ -0,0 +1,156 @@
+# job_profile.py
+"""
+Structured job requirement profiles, extracted once per job description.
+
+The same job is tailored against many resumes; instead of every run sending
+the raw description HTML to the analyze and tailor prompts, one "profile" LLM
+call condenses it into a JobProfile, cached by a hash of the description text
+(in memory and as JSON under JOB_PROFILE_DIR, default `.job_profiles/`). A
+changed description hashes differently and is profiled again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.singleflight import SingleFlight
+
+# Bump when the prompt or schema changes, so cached profiles are rebuilt.
+PROFILE_VERSION = 1
+
+PROFILE_SYSTEM_PROMPT = (
+    "You condense a job posting into a compact requirement profile used to tailor resumes. "
+    "Extract only what the posting states; leave a field empty rather than guess. Skills are short "
+    "noun phrases (e.g. 'PySpark', 'A/B testing'), not sentences. Keep responsibilities to the 3–6 that "
+    "matter most, each under 15 words. Keywords are the 10–20 terms an ATS would match on."
+)
+
+
+class JobProfile(BaseModel):
+    title: str = Field(default="", description="Job title as posted.")
+    company: str = Field(default="", description="Hiring company, if stated.")
+    seniority: str = Field(default="", description="Seniority level, e.g. junior, mid, senior, lead.")
+    location: str = Field(default="", description="Location and on-site/hybrid/remote arrangement.")
+    work_rights: str = Field(default="", description="Citizenship, visa, clearance or licence constraints.")
+    required_skills: List[str] = Field(default_factory=list, description="Must-have skills and qualifications.")
+    nice_to_have: List[str] = Field(default_factory=list, description="Preferred / bonus skills.")
+    responsibilities: List[str] = Field(default_factory=list, description="Most important duties, briefly.")
+    keywords: List[str] = Field(default_factory=list, description="Terms an ATS would match on.")
+
+    def is_empty(self) -> bool:
+        return not (self.required_skills or self.keywords or self.responsibilities)
+
+    def terms(self) -> list[str]:
+        """Skills and keywords, deduplicated in order (for local keyword ranking)."""
+        return list(dict.fromkeys(t.strip() for t in self.required_skills + self.keywords + self.nice_to_have if t.strip()))
+
+    def to_prompt(self) -> str:
+        """Compact text that replaces the raw description in prompts."""
+        head = " | ".join(v for v in (self.title, self.company, self.seniority) if v)
+        lines = [head] if head else []
+        for label, value in (("Location", self.location), ("Work rights", self.work_rights)):
+            if value:
+                lines.append(f"{label}: {value}")
+        for label, items in (("Required", self.required_skills), ("Nice to have", self.nice_to_have),
+                             ("Keywords", self.keywords)):
+            if items:
+                lines.append(f"{label}: {', '.join(items)}")
+        if self.responsibilities:
+            lines.append("Responsibilities:")
+            lines.extend(f"- {r}" for r in self.responsibilities)
+        return "\n".join(lines)
+
+
+def description_hash(job_text: str) -> str:
+    return hashlib.sha256(f"v{PROFILE_VERSION}\0{job_text}".encode("utf-8")).hexdigest()
+
+
+class JobProfileCache:
+    """
+    description hash -> JobProfile. Concurrent runs for the same job share one
+    extraction (SingleFlight); results are kept in a small LRU and, when
+    `directory` is set, written there as `<hash>.json` for other processes and
+    later restarts.
+    """
+
+    def __init__(self, directory: str | None = None, maxsize: int = 1024):
+        self.directory = directory
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, JobProfile] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def default(cls) -> "JobProfileCache":
+        return cls(os.environ.get("JOB_PROFILE_DIR", ".job_profiles"))
+
+    def get(self, job_text: str, extract: Callable[[str], JobProfile]) -> JobProfile:
+        key = description_hash(job_text)
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return profile
+        profile, _ = self._flight.do(key, lambda: self._load_or_extract(key, job_text, extract))
+        return profile
+
+    def peek(self, job_text: str | None) -> Optional[JobProfile]:
+        """The in-memory profile for `job_text`, without extracting one."""
+        with self._lock:
+            return self._entries.get(description_hash(job_text or ""))
+
+    def _load_or_extract(self, key: str, job_text: str, extract: Callable[[str], JobProfile]) -> JobProfile:
+        profile = self._read(key)
+        if profile is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            profile = extract(job_text)
+            if not profile.is_empty():
+                self._write(key, profile)
+        if not profile.is_empty():
+            with self._lock:
+                self._entries[key] = profile
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return profile
+
+    def _path(self, key: str) -> str | None:
+        return os.path.join(self.directory, f"{key}.json") if self.directory else None
+
+    def _read(self, key: str) -> Optional[JobProfile]:
+        path = self._path(key)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return JobProfile.model_validate(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable job profile {path}: {e}")
+            return None
+
+    def _write(self, key: str, profile: JobProfile) -> None:
+        path = self._path(key)
+        if not path:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(profile.model_dump(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp, path)
+        except OSError as e:  # the profile is still used for this run
+            print(f"Could not save job profile {path}: {e}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,242 @@
+# model_router.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+
+# LLM-calling steps of the agent graph ("outline"/"section" are used by section-parallel tailoring,
+# "profile" once per job description, see src/job_profile.py).
+GRAPH_NODES = ("profile", "analyze", "outline", "section", "tailor")
+
+
+def estimate_tokens(messages: Sequence[Any]) -> int:
+    """Cheap token estimate (~4 chars/token); good enough for routing decisions."""
+    return sum(len(str(getattr(m, "content", m))) for m in messages) // 4
+
+
+# -----------------------------
+# Routing table
+# -----------------------------
+
+@dataclass
+class ModelOption:
+    """
+    One model a node may use. Options are tried in order, so list them
+    cheapest/fastest first. `max_input_tokens` excludes the option for large
+    prompts; `timeout_s` is the per-call deadline after which the next option
+    is tried.
+    """
+    name: str
+    model: Any
+    max_input_tokens: int = 100_000
+    timeout_s: float | None = None
+    # runtime stats
+    latency_ewma: float | None = None
+    calls: int = 0
+    failures: int = 0
+    demoted_until: float = 0.0
+    _structured: dict = field(default_factory=dict, repr=False)
+
+    def structured(self, schema) -> Any:
+        runnable = self._structured.get(schema)
+        if runnable is None:
+            runnable = self._structured[schema] = self.model.with_structured_output(schema)
+        return runnable
+
+    def observe(self, seconds: float, alpha: float = 0.2) -> None:
+        self.calls += 1
+        self.latency_ewma = seconds if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * seconds
+
+
+@dataclass
+class NodeRoute:
+    options: list[ModelOption]
+    latency_slo_s: float | None = None
+    schema: Any = None  # structured-output schema, prebuilt for every option
+
+    def __post_init__(self):
+        if self.schema is not None:
+            for opt in self.options:
+                opt.structured(self.schema)
+
+
+class ModelRouter:
+    """
+    Per-node model selection for the agent graph.
+
+    For each call the router estimates the prompt size, drops options whose
+    context is too small, prefers options whose observed latency meets the
+    node's SLO, and runs the call under the option's timeout. On timeout or
+    error it falls back to the next eligible option.
+    """
+
+    def __init__(self, routes: dict[str, NodeRoute], max_workers: int = 32, demote_s: float = 60.0):
+        self.routes = routes
+        self.demote_s = demote_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+        self.timeouts = 0
+
+    @classmethod
+    def single(cls, llm: Any, schemas: dict[str, Any] | None = None) -> "ModelRouter":
+        """Route every node to one model (e.g. an injected or fake LLM)."""
+        schemas = schemas or {}
+        nodes = set(schemas) | set(GRAPH_NODES)
+        return cls({node: NodeRoute([ModelOption("default", llm)], schema=schemas.get(node)) for node in nodes})
+
+    # -------------------------
+    # Selection
+    # -------------------------
+
+    def candidates(self, node: str, messages: Sequence[Any]) -> list[ModelOption]:
+        route = self.routes[node]
+        tokens = estimate_tokens(messages)
+        fits = [o for o in route.options if o.max_input_tokens >= tokens] or route.options[-1:]
+        now = time.monotonic()
+        slo = route.latency_slo_s
+        with self._lock:
+            for o in fits:
+                # Demotion over: forget the latency that caused it, so the next call
+                # probes the option again instead of leaving it behind for good.
+                if o.demoted_until and o.demoted_until <= now:
+                    o.demoted_until = 0.0
+                    o.latency_ewma = None
+        # Options that recently timed out, or are known to miss the SLO, move behind
+        # the ones that meet it (or are untried); order is otherwise preserved.
+        healthy = [
+            o for o in fits
+            if o.demoted_until <= now and (slo is None or o.latency_ewma is None or o.latency_ewma <= slo)
+        ]
+        return healthy + [o for o in fits if o not in healthy]
+
+    # -------------------------
+    # Invocation
+    # -------------------------
+
+    def invoke(self, node: str, messages: Sequence[Any]) -> Any:
+        return self._call(node, messages, structured=False)
+
+    def invoke_structured(self, node: str, messages: Sequence[Any]) -> Any:
+        return self._call(node, messages, structured=True)
+
+    def _call(self, node: str, messages: Sequence[Any], structured: bool) -> Any:
+        route = self.routes[node]
+        options = self.candidates(node, messages)
+        last_error: Exception | None = None
+        for i, opt in enumerate(options):
+            runnable = opt.structured(route.schema) if structured else opt.model
+            t0 = time.perf_counter()
+            try:
+                if opt.timeout_s is None:
+                    result = runnable.invoke(list(messages))
+                else:
+                    # Backstop for clients without their own deadline; OpenAI clients are built
+                    # with `timeout=` so the HTTP request itself is aborted too.
+                    result = self._pool.submit(runnable.invoke, list(messages)).result(timeout=opt.timeout_s)
+            except FutureTimeout as e:
+                last_error = e
+                opt.failures += 1
+                opt.observe(time.perf_counter() - t0)
+                opt.demoted_until = time.monotonic() + self.demote_s
+                with self._lock:
+                    self.timeouts += 1
+            except Exception as e:
+                last_error = e
+                opt.failures += 1
+            else:
+                opt.observe(time.perf_counter() - t0)
+                if route.latency_slo_s is not None and opt.latency_ewma > route.latency_slo_s:
+                    opt.demoted_until = time.monotonic() + self.demote_s  # re-probed once this expires
+                if i:
+                    with self._lock:
+                        self.fallbacks += 1
+                return result
+        raise last_error or RuntimeError(f"no model available for node {node!r}")
+
+    def stats(self) -> dict:
+        return {
+            "fallbacks": self.fallbacks,
+            "timeouts": self.timeouts,
+            "nodes": {
+                node: [
+                    {"model": o.name, "calls": o.calls, "failures": o.failures, "latency_ewma_s": o.latency_ewma}
+                    for o in route.options
+                ]
+                for node, route in self.routes.items()
+            },
+        }
+
+
+# -----------------------------
+# Default OpenAI routing
+# -----------------------------
+
+def default_openai_router(schemas: dict[str, Any]) -> ModelRouter:
+    """
+    Production routes, overridable via env:
+      ANALYZE_MODEL (gpt-4.1-nano)  cheapest tier: yes/no clarify decision, once-per-job
+                                    requirement profile and section outline
+      ANALYZE_MAX_TOKENS (6000)     larger prompts for those steps go to TAILOR_MODEL
+      TAILOR_MODEL (gpt-4o-mini)    long-form resume generation
+      TAILOR_MAX_TOKENS (12000)     larger tailoring prompts (raw multi-page postings,
+                                    JOB_PROFILES=off) go straight to the fallback
+      TAILOR_FALLBACK_MODEL (gpt-4.1-mini)  used on timeout/error or for long prompts
+      TAILOR_TIMEOUT_S (45), TAILOR_SLO_S (20)
+      LLM_TIMEOUT_S (120)           HTTP deadline for options without a router timeout
+      LLM_MAX_RETRIES (1)           client retries; falling back is usually the better retry
+    """
+    from langchain_openai import ChatOpenAI
+
+    analyze_model = os.environ.get("ANALYZE_MODEL", "gpt-4.1-nano")
+    tailor_model = os.environ.get("TAILOR_MODEL", "gpt-4o-mini")
+    fallback_model = os.environ.get("TAILOR_FALLBACK_MODEL", "gpt-4.1-mini")
+    analyze_max_tokens = int(os.environ.get("ANALYZE_MAX_TOKENS", 6000))
+    tailor_max_tokens = int(os.environ.get("TAILOR_MAX_TOKENS", 12000))
+    tailor_timeout = float(os.environ.get("TAILOR_TIMEOUT_S", 45))
+    llm_timeout = float(os.environ.get("LLM_TIMEOUT_S", 120))
+    max_retries = int(os.environ.get("LLM_MAX_RETRIES", 1))
+
+    def option(model: str, timeout_s: float | None = None, max_input_tokens: int = 120_000, **kwargs) -> ModelOption:
+        # The client gets the same deadline as the router, so a timed-out request is
+        # actually cancelled (and no longer billed) rather than left running in the pool.
+        client = ChatOpenAI(model=model, timeout=timeout_s or llm_timeout, max_retries=max_retries, **kwargs)
+        return ModelOption(model, client, max_input_tokens=max_input_tokens, timeout_s=timeout_s)
+
+    def small_route(max_tokens: int, timeout_s: float, schema: Any) -> NodeRoute:
+        # Short structured answers: cheapest model for normal prompts, TAILOR_MODEL above
+        # ANALYZE_MAX_TOKENS, the fallback model on timeout/error.
+        return NodeRoute(
+            [
+                option(analyze_model, timeout_s=timeout_s, max_input_tokens=analyze_max_tokens,
+                       temperature=0, max_tokens=max_tokens),
+                option(tailor_model, timeout_s=timeout_s, temperature=0, max_tokens=max_tokens),
+                option(fallback_model, max_input_tokens=1_000_000, temperature=0, max_tokens=max_tokens),
+            ],
+            schema=schema,
+        )
+
+    return ModelRouter({
+        "profile": small_route(600, 20, schemas.get("profile")),
+        "analyze": small_route(200, 15, schemas.get("analyze")),
+        "outline": small_route(300, 15, schemas.get("outline")),
+        "section": NodeRoute(
+            [
+                option(tailor_model, timeout_s=tailor_timeout / 2, max_input_tokens=tailor_max_tokens, max_tokens=700),
+                option(fallback_model, max_input_tokens=1_000_000, max_tokens=700),
+            ],
+            latency_slo_s=float(os.environ.get("TAILOR_SLO_S", 20)) / 2,
+        ),
+        "tailor": NodeRoute(
+            [
+                option(tailor_model, timeout_s=tailor_timeout, max_input_tokens=tailor_max_tokens),
+                option(fallback_model, max_input_tokens=1_000_000),
+            ],
+            latency_slo_s=float(os.environ.get("TAILOR_SLO_S", 20)),
+        ),
+    })
@@ -0,0 +1,332 @@
+# page_fit.py
+"""
+Local one-page fit engine for tailored resumes.
+
+`estimate_pages` lays the Markdown out with ReportLab font metrics
+(`stringWidth`) against the same styles, page size and margins as
+`utils.save_resume_as_pdf`, without building a document. `fit_to_one_page`
+uses it to trim overflowing output deterministically (optional sections
+first, then the least job-relevant bullets) instead of asking the LLM again.
+"""
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from src.utils import RESUME_MARGINS, RESUME_PAGE_SIZE, resume_blocks, resume_styles
+
+_FRAME_PADDING = 6  # SimpleDocTemplate's frame padding on every side
+FRAME_WIDTH = RESUME_PAGE_SIZE[0] - RESUME_MARGINS["leftMargin"] - RESUME_MARGINS["rightMargin"] - 2 * _FRAME_PADDING
+FRAME_HEIGHT = RESUME_PAGE_SIZE[1] - RESUME_MARGINS["topMargin"] - RESUME_MARGINS["bottomMargin"] - 2 * _FRAME_PADDING
+
+LIST_INDENT = 10         # ListFlowable(leftIndent=10) in save_resume_as_pdf
+SMALL_FONT_SIZE = 8.5    # <small> lines
+BLANK_HEIGHT = 6         # Spacer(1, 6)
+END_HEIGHT = 4           # trailing Spacer(1, 4); it alone can push a blank second page
+HR_HEIGHT = 6 + 4 + 0.8  # Spacer(1, 6) + HRFlowable(spaceBefore=4, thickness=0.8); spaceAfter counted separately
+HR_SPACE_AFTER = 6
+
+# Dropped (in this order) before any bullet is touched.
+OPTIONAL_SECTIONS = ("CERTIFICATIONS", "PROJECTS")
+MIN_BULLETS_PER_LIST = 2
+
+_FACES = {
+    "Helvetica": ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique"),
+    "Helvetica-Bold": ("Helvetica-Bold", "Helvetica-Bold", "Helvetica-BoldOblique", "Helvetica-BoldOblique"),
+}
+_TAG_RE = re.compile(r"<(/?)(\w+)([^>]*)>")
+_SIZE_RE = re.compile(r"size\s*=\s*[\"']?([\d.]+)")
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def _words(markup: str, font_name: str, font_size: float) -> list[list[tuple[float, float]]]:
+    """
+    Split paragraph markup into lines (at <br/>) of words, each word given as
+    (width, width_of_following_space) using the font active for each run.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    faces = _FACES.get(font_name, (font_name,) * 4)
+    bold = italic = 0
+    sizes = [font_size]
+    lines: list[list[tuple[float, float]]] = [[]]
+    word, space = 0.0, 0.0
+    in_word = False
+
+    def emit_text(text: str):
+        nonlocal word, space, in_word
+        face = faces[bold + 2 * italic]
+        size = sizes[-1]
+        for part in re.split(r"(\s+)", html.unescape(text)):
+            if not part:
+                continue
+            if part.isspace():
+                if in_word:
+                    lines[-1].append((word, stringWidth(" ", face, size)))
+                    word, in_word = 0.0, False
+            else:
+                word += stringWidth(part, face, size)
+                in_word = True
+
+    def end_word():
+        nonlocal word, in_word
+        if in_word:
+            lines[-1].append((word, 0.0))
+            word, in_word = 0.0, False
+
+    pos = 0
+    for m in _TAG_RE.finditer(markup):
+        emit_text(markup[pos:m.start()])
+        pos = m.end()
+        closing, tag = m.group(1), m.group(2).lower()
+        if tag == "b":
+            bold = 0 if closing else 1
+        elif tag == "i":
+            italic = 0 if closing else 1
+        elif tag == "font":
+            if closing:
+                if len(sizes) > 1:
+                    sizes.pop()
+            else:
+                size = _SIZE_RE.search(m.group(3))
+                sizes.append(float(size.group(1)) if size else sizes[-1])
+        elif tag == "br":
+            end_word()
+            lines.append([])
+    emit_text(markup[pos:])
+    end_word()
+    return lines
+
+
+def count_lines(markup: str, font_name: str, font_size: float, width: float, space_shrinkage: float = 0.05) -> int:
+    """
+    Greedy word wrap, as ReportLab's Paragraph does it: a line may overrun
+    `width` by `space_shrinkage` of the inter-word spaces already on it.
+    """
+    total = 0
+    for words in _words(markup, font_name, font_size):
+        used, spaces, n = 0.0, 0.0, 1
+        prev_space = 0.0
+        for i, (w, space) in enumerate(words):
+            if i and used + prev_space + w > width + space_shrinkage * (spaces + prev_space):
+                n += 1
+                used, spaces = w, 0.0
+            elif i:
+                used += prev_space + w
+                spaces += prev_space
+            else:
+                used = w
+            prev_space = space or prev_space
+        total += n
+    return total
+
+
+@dataclass
+class _Box:
+    """One flowable as the frame sees it: splittable into `lines` rows of `leading`."""
+    lines: int
+    leading: float
+    space_before: float = 0.0
+    space_after: float = 0.0
+    splittable: bool = True
+
+
+def _boxes(markdown: str) -> list[_Box]:
+    styles = resume_styles()
+    body, h1, h2 = styles["ResumeBody"], styles["H1"], styles["H2"]
+
+    def para(markup: str, style, width: float = FRAME_WIDTH, size: float | None = None) -> _Box:
+        n = count_lines(markup, style.fontName, size or style.fontSize, width, style.spaceShrinkage)
+        return _Box(n, style.leading, style.spaceBefore, style.spaceAfter)
+
+    boxes = []
+    for kind, value in resume_blocks(markdown):
+        if kind == "hr":
+            boxes.append(_Box(1, HR_HEIGHT, 0, HR_SPACE_AFTER, splittable=False))
+        elif kind == "h1":
+            boxes.append(para(value, h1))
+        elif kind == "h2":
+            boxes.append(para(value, h2))
+        elif kind == "list":
+            boxes.extend(para(item, body, FRAME_WIDTH - LIST_INDENT) for item in value)
+        elif kind == "blank":
+            boxes.append(_Box(1, BLANK_HEIGHT, splittable=False))
+        elif kind == "small":
+            boxes.append(para(value, body, size=SMALL_FONT_SIZE))
+        else:
+            boxes.append(para(value, body))
+    boxes.append(_Box(1, END_HEIGHT, splittable=False))
+    return boxes
+
+
+def estimate_pages(markdown: str) -> int:
+    """Predicted page count of `save_resume_as_pdf(markdown, ...)`."""
+    if not markdown or not markdown.strip():
+        return 1
+    pages, y, at_top, prev_after = 1, FRAME_HEIGHT, True, 0.0
+    for box in _boxes(markdown):
+        lines = box.lines
+        while lines:
+            before = 0.0 if at_top else max(box.space_before - prev_after, 0)
+            room = y - before
+            fit = lines if lines * box.leading <= room else int(room // box.leading) if box.splittable else 0
+            if fit < lines and not at_top and (fit == 0 or fit < min(2, lines)):
+                # Nothing (or a lone orphan line) fits: the flowable moves to the next page.
+                pages, y, at_top, prev_after = pages + 1, FRAME_HEIGHT, True, 0.0
+                continue
+            fit = max(fit, 1)
+            y -= before + fit * box.leading
+            lines -= fit
+            at_top = False
+            if lines:
+                pages, y, at_top, prev_after = pages + 1, FRAME_HEIGHT, True, 0.0
+        y -= box.space_after
+        prev_after = box.space_after
+    return pages
+
+
+# -----------------------------
+# Deterministic trimming
+# -----------------------------
+
+@dataclass
+class FitResult:
+    markdown: str
+    pages: int
+    trimmed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.trimmed)
+
+
+def _section_of(lines: list[str]) -> list[str | None]:
+    current, owners = None, []
+    for line in lines:
+        if line.startswith("## "):
+            # Models copy template headings like "## PROJECTS (optional if adds value)".
+            current = re.sub(r"\([^)]*\)", "", line[3:]).strip(" :").upper()
+        owners.append(current)
+    return owners
+
+
+def _drop_section(lines: list[str], name: str) -> list[str] | None:
+    owners = _section_of(lines)
+    idx = [i for i, owner in enumerate(owners) if owner == name]
+    if not idx:
+        return None
+    start, end = idx[0], idx[-1] + 1
+    # A section owns the <hr> that follows it; the last one instead drops the rule that introduced it.
+    if lines[end - 1].strip().lower() != "<hr>":
+        while start > 0 and not lines[start - 1].strip():
+            start -= 1
+        if start > 0 and lines[start - 1].strip().lower() == "<hr>":
+            start -= 1
+    return lines[:start] + lines[end:]
+
+
+def _bullet_score(text: str, keywords: list[str]) -> int:
+    low = text.lower()
+    return sum(1 for k in keywords if k in low)
+
+
+def _droppable_bullet(lines: list[str], keywords: list[str], min_keep: int) -> int | None:
+    """Index of the least relevant bullet in a list longer than `min_keep`; ties drop the later one."""
+    runs, run = [], []
+    for i, line in enumerate(lines):
+        if line.lstrip().startswith("- "):
+            run.append(i)
+        elif run and line.strip():
+            runs.append(run)
+            run = []
+    if run:
+        runs.append(run)
+
+    best, best_key = None, None
+    for run in runs:
+        if len(run) <= min_keep:
+            continue
+        for i in run:
+            key = (_bullet_score(lines[i], keywords), -i)
+            if best_key is None or key < best_key:
+                best, best_key = i, key
+    return best
+
+
+def _collapse_blanks(lines: list[str]) -> list[str]:
+    out = []
+    for line in lines:
+        if not line.strip() and (not out or not out[-1].strip() or out[-1].strip().lower() == "<hr>"):
+            continue
+        out.append(line)
+    return out
+
+
+def fit_to_one_page(markdown: str, keywords: Iterable[str] | None = None, max_pages: int = 1) -> FitResult:
+    """
+    Trim `markdown` until it is estimated to fit in `max_pages`:
+      1. collapse redundant blank lines (no content lost);
+      2. drop optional sections (CERTIFICATIONS, then PROJECTS);
+      3. drop the bullet matching the fewest `keywords`, keeping two per list
+         (then one, if that is still not enough).
+    Stops as soon as it fits; returns whatever is left if nothing more can go.
+    """
+    keywords = sorted({k.lower() for k in (keywords or []) if k and k.strip()})
+    pages = estimate_pages(markdown)
+    if pages <= max_pages:
+        return FitResult(markdown, pages)
+
+    lines = markdown.splitlines()
+    trimmed = []
+
+    collapsed = _collapse_blanks(lines)
+    if collapsed != lines:
+        lines = collapsed
+        trimmed.append("blank lines")
+        pages = estimate_pages("\n".join(lines))
+        if pages <= max_pages:
+            return FitResult("\n".join(lines), pages, trimmed)
+
+    for name in OPTIONAL_SECTIONS:
+        reduced = _drop_section(lines, name)
+        if reduced is not None:
+            lines = reduced
+            trimmed.append(f"section {name}")
+            pages = estimate_pages("\n".join(lines))
+            if pages <= max_pages:
+                return FitResult("\n".join(lines), pages, trimmed)
+
+    for min_keep in (MIN_BULLETS_PER_LIST, 1):
+        while pages > max_pages:
+            i = _droppable_bullet(lines, keywords, min_keep)
+            if i is None:
+                break
+            trimmed.append(f"bullet: {lines[i].strip()[2:60]}")
+            del lines[i]
+            pages = estimate_pages("\n".join(lines))
+
+    return FitResult("\n".join(lines), pages, trimmed)
+
+
+def job_keywords(job_text: str, limit: int = 40) -> list[str]:
+    """Most frequent distinctive terms of a job posting, used to rank bullets for trimming."""
+    words = re.findall(r"[A-Za-z][A-Za-z0-9+#.\-]{2,}", re.sub(r"<[^>]+>", " ", job_text or ""))
+    counts: dict[str, int] = {}
+    for w in words:
+        w = w.lower().rstrip(".-")
+        if len(w) > 2 and w not in _STOPWORDS:
+            counts[w] = counts.get(w, 0) + 1
+    return sorted(counts, key=lambda w: (-counts[w], w))[:limit]
+
+
+_STOPWORDS = frozenset("""
+the and for with you your our are will from that this have has not but all can who any job role
+team work working about into their they them what when where which while able also more most must
+such than then these those other over per via within without across including include includes
+experience years year strong skills ability new using use well etc may should would could
+""".split())
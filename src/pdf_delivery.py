@@ -0,0 +1,232 @@
+# pdf_delivery.py
+from __future__ import annotations
+
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass
+from typing import Iterator
+from urllib.parse import quote
+
+from flask import Flask, Response, request
+from werkzeug.exceptions import NotFound, RequestedRangeNotSatisfiable
+
+
+CHUNK_SIZE = 256 * 1024
+
+
+# -----------------------------
+# Allow-list index of persona files
+# -----------------------------
+
+@dataclass(frozen=True)
+class ArtifactEntry:
+    path: str
+    size: int
+    mtime: float
+
+    @property
+    def etag(self) -> str:
+        return f"{self.size:x}-{int(self.mtime * 1_000_000):x}"
+
+
+class PersonaFileIndex:
+    """
+    Precomputed allow-list of servable files under `personas/<persona>/`.
+
+    Only files that were present in a directory listing (or explicitly
+    registered after being generated) can be served, so user-supplied path
+    segments never reach the filesystem directly.
+    """
+
+    def __init__(self, root: str = "personas", extensions: tuple[str, ...] = (".pdf",)):
+        self.root = os.path.abspath(root)
+        self.extensions = extensions
+        self._entries: dict[tuple[str, str], ArtifactEntry] = {}
+        self._lock = threading.Lock()
+        self.rebuild()
+
+    def _scan_persona(self, persona: str) -> dict[tuple[str, str], ArtifactEntry]:
+        entries = {}
+        persona_dir = os.path.join(self.root, persona)
+        with os.scandir(persona_dir) as it:
+            for de in it:
+                if de.is_file() and de.name.lower().endswith(self.extensions) and not de.name.startswith("."):
+                    st = de.stat()
+                    entries[(persona, de.name)] = ArtifactEntry(de.path, st.st_size, st.st_mtime)
+        return entries
+
+    def rebuild(self) -> None:
+        entries = {}
+        if os.path.isdir(self.root):
+            for persona in os.listdir(self.root):
+                if os.path.isdir(os.path.join(self.root, persona)) and not persona.startswith("."):
+                    entries.update(self._scan_persona(persona))
+        with self._lock:
+            self._entries = entries
+
+    def register(self, path: str) -> None:
+        """Add a freshly generated file (e.g. a tailored resume PDF) to the index."""
+        path = os.path.abspath(path)
+        persona_dir, filename = os.path.split(path)
+        if os.path.dirname(persona_dir) != self.root or not filename.lower().endswith(self.extensions):
+            return
+        st = os.stat(path)
+        with self._lock:
+            self._entries[(os.path.basename(persona_dir), filename)] = ArtifactEntry(path, st.st_size, st.st_mtime)
+
+    def refresh(self, persona: str, filename: str | None = None) -> None:
+        """Re-read one file (or a whole persona folder) after it changed on disk."""
+        if filename is None:
+            persona_dir = os.path.join(self.root, persona)
+            fresh = self._scan_persona(persona) if os.path.isdir(persona_dir) else {}
+            with self._lock:
+                for key in [k for k in self._entries if k[0] == persona]:
+                    del self._entries[key]
+                self._entries.update(fresh)
+            return
+        path = os.path.join(self.root, persona, filename)
+        if os.path.isfile(path):
+            self.register(path)
+        else:
+            with self._lock:
+                self._entries.pop((persona, filename), None)
+
+    def lookup(self, persona: str, filename: str) -> ArtifactEntry | None:
+        entry = self._entries.get((persona, filename))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(entry.path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop((persona, filename), None)
+            return None
+        if st.st_size != entry.size or st.st_mtime != entry.mtime:
+            entry = ArtifactEntry(entry.path, st.st_size, st.st_mtime)
+            with self._lock:
+                self._entries[(persona, filename)] = entry
+        return entry
+
+
+# -----------------------------
+# Serving
+# -----------------------------
+
+def _iter_file_range(path: str, start: int, stop: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream bytes [start, stop) in fixed-size chunks; never holds more than one chunk."""
+    with open(path, "rb") as f:
+        fd = f.fileno()
+        pos = start
+        while pos < stop:
+            chunk = os.pread(fd, min(chunk_size, stop - pos), pos)
+            if not chunk:
+                break
+            pos += len(chunk)
+            yield chunk
+
+
+class ArtifactServer:
+    """
+    Serves persona artifacts (resume PDFs) with Range support.
+
+    `ARTIFACT_OFFLOAD` (app config or env var) selects how bytes are sent:
+      - unset:         stream from Python; full-file responses go through
+                       `wsgi.file_wrapper` so gunicorn can use sendfile(2).
+      - "x-sendfile":  Apache/lighttpd style `X-Sendfile: <abs path>`.
+      - "x-accel":     nginx `X-Accel-Redirect: <ARTIFACT_ACCEL_PREFIX>/<persona>/<file>`
+                       (map the prefix to the personas directory as an `internal` location).
+    With offload the worker returns headers only and the proxy handles Range.
+    """
+
+    def __init__(self, app: Flask, root: str = "personas"):
+        app.config.setdefault("ARTIFACT_OFFLOAD", os.environ.get("ARTIFACT_OFFLOAD"))
+        app.config.setdefault("ARTIFACT_ACCEL_PREFIX", os.environ.get("ARTIFACT_ACCEL_PREFIX", "/_personas"))
+        self.app = app
+        self.index = PersonaFileIndex(root)
+
+    def send(self, persona: str, filename: str) -> Response:
+        entry = self.index.lookup(persona, filename)
+        if entry is None:
+            raise NotFound()
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        offload = (self.app.config.get("ARTIFACT_OFFLOAD") or "").lower()
+        if offload in ("x-sendfile", "x-accel"):
+            resp = Response(mimetype=mimetype)
+            if offload == "x-sendfile":
+                resp.headers["X-Sendfile"] = entry.path
+            else:
+                prefix = self.app.config["ARTIFACT_ACCEL_PREFIX"].rstrip("/")
+                resp.headers["X-Accel-Redirect"] = f"{prefix}/{quote(persona)}/{quote(filename)}"
+            self._finish(resp, entry)
+            if resp.status_code == 304:
+                # Some proxies ignore the status and send the file anyway.
+                resp.headers.pop("X-Sendfile", None)
+                resp.headers.pop("X-Accel-Redirect", None)
+            return resp
+
+        resp = Response(mimetype=mimetype, direct_passthrough=True)
+        self._finish(resp, entry)
+        if resp.status_code == 304:
+            return resp
+
+        byte_range = self._requested_range(entry)
+        if byte_range is None:
+            f = open(entry.path, "rb")
+            resp.response = request.environ.get("wsgi.file_wrapper", _FileChunks)(f, CHUNK_SIZE)
+            resp.content_length = entry.size
+        else:
+            start, stop = byte_range
+            resp.status_code = 206
+            resp.response = _iter_file_range(entry.path, start, stop)
+            resp.content_length = stop - start
+            resp.content_range = f"bytes {start}-{stop - 1}/{entry.size}"
+        return resp
+
+    def _finish(self, resp: Response, entry: ArtifactEntry) -> Response:
+        resp.set_etag(entry.etag)
+        resp.last_modified = entry.mtime
+        resp.accept_ranges = "bytes"
+        # Tailored PDFs are regenerated under the same name, so always revalidate.
+        resp.cache_control.no_cache = True
+        if request.if_none_match.contains(entry.etag) or (
+            not request.if_none_match and request.if_modified_since
+            and int(entry.mtime) <= request.if_modified_since.timestamp()
+        ):
+            resp.status_code = 304
+        return resp
+
+    def _requested_range(self, entry: ArtifactEntry) -> tuple[int, int] | None:
+        rng = request.range
+        if rng is None or rng.units != "bytes" or len(rng.ranges) != 1:
+            return None
+        if_range = request.if_range
+        if if_range.etag is not None and if_range.etag != entry.etag:
+            return None
+        if if_range.date is not None and int(entry.mtime) > if_range.date.timestamp():
+            return None
+        span = rng.range_for_length(entry.size)
+        if span is None:
+            raise RequestedRangeNotSatisfiable(length=entry.size)
+        return span
+
+
+class _FileChunks:
+    """Fallback for servers without `wsgi.file_wrapper`."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        data = self.f.read(self.chunk_size)
+        if not data:
+            raise StopIteration
+        return data
+
+    def close(self) -> None:
+        self.f.close()
@@ -0,0 +1,207 @@
+# pdf_text.py
+"""
+Resume PDF text extraction.
+
+    text = extract_text("personas/Data Analyst/resume.pdf")
+
+Pages are extracted by a pluggable backend ("pypdf2", or "pymupdf" when
+installed). Documents with at least `PARALLEL_MIN_PAGES` pages are split into
+page ranges handled by a process pool; shorter ones (every normal resume) are
+cheaper to do in-process. Extraction stops early at `max_pages` / `max_chars`,
+and the text is normalised (ligatures, odd spaces, zero-width characters,
+blank-line runs) before it reaches the prompts.
+
+PDF_TEXT_WORKERS sets the pool size (default: CPU count, 0 disables the pool).
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+try:  # optional: PyMuPDF, several times faster than PyPDF2 on large documents
+    import fitz
+except ImportError:  # pragma: no cover - depends on environment
+    fitz = None
+
+DEFAULT_MAX_PAGES = 20        # longer "resumes" are truncated, not fed whole to the LLM
+DEFAULT_MAX_CHARS = 60_000
+PARALLEL_MIN_PAGES = 8        # below this, pool start-up and re-parsing cost more than they save
+MIN_PAGES_PER_CHUNK = 4
+
+
+# -----------------------------
+# Backends: open(path) -> document with len() and page_text(i)
+# -----------------------------
+
+class _PyPDF2Document:
+    def __init__(self, path: str):
+        from PyPDF2 import PdfReader
+
+        self._reader = PdfReader(path)
+
+    def __len__(self) -> int:
+        return len(self._reader.pages)
+
+    def page_text(self, i: int) -> str:
+        return self._reader.pages[i].extract_text() or ""
+
+    def close(self) -> None:
+        pass
+
+
+class _PyMuPDFDocument:
+    def __init__(self, path: str):
+        self._doc = fitz.open(path)
+
+    def __len__(self) -> int:
+        return self._doc.page_count
+
+    def page_text(self, i: int) -> str:
+        return self._doc.load_page(i).get_text()
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+BACKENDS: dict[str, Callable] = {"pypdf2": _PyPDF2Document}
+if fitz is not None:
+    BACKENDS["pymupdf"] = _PyMuPDFDocument
+
+
+def default_backend() -> str:
+    return os.environ.get("PDF_TEXT_BACKEND") or ("pymupdf" if fitz is not None else "pypdf2")
+
+
+def _extract_range(backend: str, path: str, start: int, stop: int) -> list[str]:
+    """Pool entry point (module level so it pickles)."""
+    doc = BACKENDS[backend](path)
+    try:
+        return [doc.page_text(i) for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+# -----------------------------
+# Normalisation
+# -----------------------------
+
+_LIGATURES = str.maketrans({
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl",
+    "\ufb05": "st", "\ufb06": "st",
+    # Unicode spaces -> plain space; zero-width characters and soft hyphens vanish.
+    **dict.fromkeys("\t\u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008"
+                    "\u2009\u200a\u202f\u205f\u3000", " "),
+    **dict.fromkeys("\u200b\u200c\u200d\u2060\ufeff\u00ad\r"),
+})
+_SPACE_RUN = re.compile(r" {2,}")
+_TRAILING = re.compile(r" +\n")
+_BLANK_RUN = re.compile(r"\n{3,}")
+
+
+def normalize_text(text: str) -> str:
+    """Expand ligatures, unify spaces, drop invisible characters, collapse blank runs.
+    Bullet glyphs are kept; src/explain.py uses them to find list items."""
+    text = text.translate(_LIGATURES)
+    text = _SPACE_RUN.sub(" ", text)
+    text = _TRAILING.sub("\n", text)
+    text = _BLANK_RUN.sub("\n\n", text)
+    return text.strip()
+
+
+# -----------------------------
+# Pool
+# -----------------------------
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def _workers() -> int:
+    return int(os.environ.get("PDF_TEXT_WORKERS", os.cpu_count() or 1))
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    """One pool per process, created on first large document (pools do not survive fork)."""
+    global _pool, _pool_pid
+    workers = _workers()
+    if workers <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: callers are multi-threaded web workers.
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+# -----------------------------
+# Extraction
+# -----------------------------
+
+def _chunks(pages: int, workers: int) -> list[tuple[int, int]]:
+    # Two ranges per worker: even split, and a char limit can stop after the first round.
+    size = max(MIN_PAGES_PER_CHUNK, -(-pages // (2 * workers)))
+    return [(start, min(start + size, pages)) for start in range(0, pages, size)]
+
+
+def iter_pages(path: str, max_pages: int | None = DEFAULT_MAX_PAGES, backend: str | None = None,
+               parallel: bool = True) -> Iterator[str]:
+    """Raw page texts in order. In parallel mode a page range is yielded once every
+    earlier range is done; a consumer that stops early cancels the rest."""
+    backend = backend or default_backend()
+    doc = BACKENDS[backend](path)
+    try:
+        pages = len(doc) if max_pages is None else min(len(doc), max_pages)
+        pool = _get_pool() if parallel and pages >= PARALLEL_MIN_PAGES else None
+        if pool is None:
+            for i in range(pages):
+                yield doc.page_text(i)
+            return
+    finally:
+        doc.close()
+    # Keep one range per worker in flight and submit the next as each is consumed,
+    # so stopping early wastes at most one round of ranges.
+    pending = deque(_chunks(pages, _workers()))
+    futures: deque = deque()
+    try:
+        while pending or futures:
+            while pending and len(futures) < _workers():
+                start, stop = pending.popleft()
+                futures.append(pool.submit(_extract_range, backend, path, start, stop))
+            yield from futures.popleft().result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_text(path: str, max_pages: int | None = DEFAULT_MAX_PAGES, max_chars: int | None = DEFAULT_MAX_CHARS,
+                 backend: str | None = None, parallel: bool = True, normalize: bool = True) -> str:
+    """Text of the first `max_pages` pages, cut at `max_chars` (limits apply to raw text)."""
+    parts, total = [], 0
+    pages = iter_pages(path, max_pages, backend, parallel)
+    try:
+        for text in pages:
+            parts.append(text)
+            total += len(text) + 1
+            if max_chars is not None and total >= max_chars:
+                break
+    finally:
+        pages.close()
+    text = "\n".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return normalize_text(text) if normalize else text
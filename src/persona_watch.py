@@ -0,0 +1,296 @@
+# persona_watch.py
+"""
+Change notifications for the `personas/` tree.
+
+Uses Linux inotify (through ctypes, no extra dependency) and falls back to
+periodic mtime scanning elsewhere. Raw filesystem events are debounced and
+turned into deduplicated `PersonaEvent`s, so subscribers (caches, indexes)
+rebuild only what changed:
+
+    personas/<p>/jobs/job<ID>-card.json | job<ID>-description.txt -> ("job", p, ID)
+    personas/<p>/resume.pdf                                      -> ("resume", p)
+    personas/<p>/<other>.pdf|.txt (generated artifacts)          -> ("artifact", p, path=...)
+    personas/<p>/ created or removed                             -> ("persona", p)
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple
+
+
+class PersonaEvent(NamedTuple):
+    kind: str                    # "job" | "resume" | "persona" | "artifact"
+    persona: str
+    job_id: str | None = None
+    path: str | None = None      # artifact file name
+
+
+_JOB_FILE = re.compile(r"^job(.+?)-(?:card\.json|description\.txt)$")
+
+
+def classify(root: str, path: str) -> PersonaEvent | None:
+    """Map a changed path under `root` to the event it stands for (None if irrelevant)."""
+    rel = os.path.relpath(path, root)
+    parts = rel.split(os.sep)
+    if rel.startswith("..") or parts[0] in (".", "") or any(p.startswith(".") for p in parts):
+        return None
+    persona = parts[0]
+    if len(parts) == 1:
+        return PersonaEvent("persona", persona)
+    name = parts[-1]
+    if ".tmp" in name or name.endswith("~"):
+        return None
+    if len(parts) == 2:
+        if name == "jobs":
+            return PersonaEvent("persona", persona)
+        if name == "resume.pdf":
+            return PersonaEvent("resume", persona)
+        return PersonaEvent("artifact", persona, path=name)
+    if len(parts) == 3 and parts[1] == "jobs":
+        m = _JOB_FILE.match(name)
+        if m:
+            return PersonaEvent("job", persona, m.group(1))
+    return None
+
+
+def _dedupe(events: Iterable[PersonaEvent]) -> list[PersonaEvent]:
+    events = list(dict.fromkeys(events))
+    # A persona-wide event subsumes that persona's job/resume events.
+    whole = {e.persona for e in events if e.kind == "persona"}
+    return [e for e in events if e.kind in ("persona", "artifact") or e.persona not in whole]
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+class _Inotify:
+    """Minimal inotify binding: watches the root, each persona folder and its jobs/ folder."""
+
+    IN_ATTRIB, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x4, 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_Q_OVERFLOW, IN_ISDIR = 0x100, 0x200, 0x400, 0x4000, 0x40000000
+    MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify not available")
+        self._libc = libc
+        self.root = root
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, str] = {}
+        self._add_tree(root)
+
+    def _add(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = path
+
+    def _add_tree(self, path: str) -> list[str]:
+        """Watch `path` and its relevant subfolders; returns files already inside (for new folders)."""
+        found = []
+        self._add(path)
+        depth = 0 if path == self.root else os.path.relpath(path, self.root).count(os.sep) + 1
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return found
+        for de in entries:
+            if de.is_dir() and (depth == 0 or (depth == 1 and de.name == "jobs")):
+                found.extend(self._add_tree(de.path))
+            elif de.is_file():
+                found.append(de.path)
+        return found
+
+    def read(self, timeout: float) -> list[str] | None:
+        """Changed paths within `timeout` seconds; None means "rescan everything" (queue overflow)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths, off = [], 0
+        while off + self._EVENT.size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, off)
+            off += self._EVENT.size
+            name = data[off:off + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            off += length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            base = self._dirs.get(wd)
+            if base is None:
+                continue
+            if mask & self.IN_DELETE_SELF:
+                self._dirs.pop(wd, None)
+                paths.append(base)
+                continue
+            path = os.path.join(base, name) if name else base
+            paths.append(path)
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                # Files may land in a new folder before its watch exists.
+                paths.extend(self._add_tree(path))
+        return paths
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class _Poller:
+    """Fallback: compare (mtime, size) of every relevant file every `interval` seconds."""
+
+    def __init__(self, root: str, interval: float):
+        self.root = root
+        self.interval = interval
+        self._state = self._scan()
+
+    @staticmethod
+    def _entries(path: str) -> list[os.DirEntry]:
+        # Folders can vanish between listing their parent and listing them.
+        try:
+            return list(os.scandir(path))
+        except OSError:
+            return []
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        state = {}
+        for persona in self._entries(self.root):
+            if not persona.is_dir():
+                continue
+            state[persona.path] = (0, 0)
+            for de in self._entries(persona.path):
+                entries = self._entries(de.path) if de.is_dir() and de.name == "jobs" else [de]
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            state[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        continue
+        return state
+
+    def read(self, timeout: float) -> list[str]:
+        time.sleep(min(timeout, self.interval))
+        new = self._scan()
+        old, self._state = self._state, new
+        return [p for p in new.keys() | old.keys() if new.get(p) != old.get(p)]
+
+    def close(self) -> None:
+        pass
+
+
+# -----------------------------
+# Watcher
+# -----------------------------
+
+class PersonaWatcher:
+    """
+    Background thread turning `personas/` changes into debounced PersonaEvent
+    batches. `subscribe(callback)` registers a `callback(events)`; callbacks
+    run on the watcher thread and should only invalidate, not rebuild.
+
+    backend: "auto" (inotify, else polling), "inotify" or "poll".
+    """
+
+    def __init__(self, root: str = "personas", backend: str = "auto",
+                 debounce_s: float = 0.25, max_delay_s: float = 2.0, poll_interval_s: float = 2.0):
+        self.root = os.path.abspath(root)
+        self.debounce_s = debounce_s
+        self.max_delay_s = max_delay_s
+        self.poll_interval_s = poll_interval_s
+        self.backend_name = backend
+        self._subscribers: list[Callable[[list[PersonaEvent]], None]] = []
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._source = None
+        self.batches = 0
+        self.events = 0
+
+    def subscribe(self, callback: Callable[[list[PersonaEvent]], None]) -> Callable:
+        self._subscribers.append(callback)
+        return callback
+
+    def _open(self):
+        if self.backend_name in ("auto", "inotify"):
+            try:
+                source = _Inotify(self.root)
+                self.backend_name = "inotify"
+                return source
+            except (OSError, AttributeError):
+                if self.backend_name == "inotify":
+                    raise
+        self.backend_name = "poll"
+        return _Poller(self.root, self.poll_interval_s)
+
+    def start(self) -> "PersonaWatcher":
+        if self._thread is None:
+            self._source = self._open()
+            self._thread = threading.Thread(target=self._run, name="persona-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def _all_personas(self) -> list[PersonaEvent]:
+        try:
+            return [PersonaEvent("persona", p) for p in os.listdir(self.root) if not p.startswith(".")]
+        except OSError:
+            return []
+
+    def _run(self) -> None:
+        pending: dict[PersonaEvent, None] = {}
+        first = last = 0.0
+        while not self._stop.is_set():
+            wait = self.debounce_s if pending else 1.0
+            try:
+                paths = self._source.read(wait)
+            except Exception as e:  # keep watching; treat the unknown change as "everything changed"
+                print(f"persona watch read failed: {e}")
+                self._stop.wait(wait)
+                paths = None
+            now = time.monotonic()
+            if paths is None:
+                events = self._all_personas()
+            else:
+                events = [e for e in (classify(self.root, p) for p in paths) if e is not None]
+            if events:
+                if not pending:
+                    first = now
+                last = now
+                pending.update(dict.fromkeys(events))
+            # Flush once the burst has been quiet for `debounce_s`, or has lasted `max_delay_s`.
+            if pending and (now - last >= self.debounce_s or now - first >= self.max_delay_s):
+                self.dispatch(list(pending))
+                pending.clear()
+
+    def dispatch(self, events: Iterable[PersonaEvent]) -> None:
+        batch = _dedupe(events)
+        if not batch:
+            return
+        self.batches += 1
+        self.events += len(batch)
+        for callback in list(self._subscribers):
+            try:
+                callback(batch)
+            except Exception as e:  # one broken subscriber must not stop the others
+                print(f"persona watch subscriber failed: {e}")
@@ -0,0 +1,260 @@
+# prefetch.py
+"""
+Speculative tailoring: start a low-priority agent run for a job as soon as its
+detail panel is opened, so a later "Tailor CV" click finds the result ready (or
+joins the run already in progress through the shared SingleFlight).
+
+Speculation costs LLM calls, so it is bounded:
+  - a small priority queue (newest panel first) with at most `max_queued` items;
+  - opening a panel cancels queued prefetches for other jobs of the same group
+    (persona) -- the user has moved on;
+  - at most `budget_per_hour` prefetch runs are started per process;
+  - unclaimed results expire after `ttl_s` or when more than `max_ready` are held.
+
+Runs already started are not interrupted; if nobody claims their result it is
+counted as wasted work.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable
+
+from src.singleflight import SingleFlight
+
+
+class _Ready:
+    __slots__ = ("result", "error", "finished_at", "run_s")
+
+    def __init__(self, result: Any, error: BaseException | None, run_s: float):
+        self.result = result
+        self.error = error
+        self.finished_at = time.monotonic()
+        self.run_s = run_s
+
+
+class Prefetcher:
+    def __init__(self, singleflight: SingleFlight, workers: int = 1, max_queued: int = 3,
+                 budget_per_hour: int = 30, max_ready: int = 16, ttl_s: float = 900.0,
+                 keep_errors: tuple[type[BaseException], ...] | Callable[[], tuple] = ()):
+        self.singleflight = singleflight
+        self.workers = workers
+        self.max_queued = max_queued
+        self.budget_per_hour = budget_per_hour
+        self.max_ready = max_ready
+        self.ttl_s = ttl_s
+        # Exceptions that are a valid outcome to hand out (e.g. ClarificationNeeded);
+        # any other failure is dropped and the user's request runs normally. A callable
+        # is resolved on first use, so callers need not import heavy modules up front.
+        self.keep_errors = keep_errors
+
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, Hashable]] = []
+        self._queued: dict[Hashable, tuple[int, Callable[[], Any], Hashable]] = {}  # key -> (seq, fn, group)
+        self._running: set[Hashable] = set()
+        self._claimed: dict[Hashable, int] = {}   # running prefetch -> requests that joined it
+        self._handoff: dict[Hashable, _Ready] = {}  # finished claimed runs, until their claimers return
+        self._ready: OrderedDict[Hashable, _Ready] = OrderedDict()
+        self._started: deque[float] = deque()     # start times within the budget window
+        self._seq = itertools.count()
+        self._pid = None
+        self.counters = dict.fromkeys(
+            ("scheduled", "started", "completed", "cancelled", "over_budget", "dropped", "errors",
+             "hits_ready", "hits_in_flight", "misses", "wasted"), 0)
+        self.saved_s = 0.0    # run time of prefetches whose result was used
+        self.wasted_s = 0.0   # run time of prefetches whose result was never used
+
+    # ---- scheduling ----
+    def schedule(self, key: Hashable, fn: Callable[[], Any], group: Hashable = None) -> bool:
+        """Queue `fn` for `key` unless it is already ready, queued or running."""
+        self._ensure_workers()
+        with self._cond:
+            self._expire()
+            # The user moved on: drop queued work for other jobs of this group.
+            for other, (_, _, other_group) in list(self._queued.items()):
+                if other != key and other_group == group:
+                    del self._queued[other]
+                    self.counters["cancelled"] += 1
+            if key in self._ready or key in self._queued or key in self._running \
+                    or self.singleflight.in_flight(key):
+                return False
+            if len(self._queued) >= self.max_queued:
+                del self._queued[min(self._queued, key=lambda k: self._queued[k][0])]
+                self.counters["dropped"] += 1
+            seq = next(self._seq)
+            self._queued[key] = (seq, fn, group)
+            heapq.heappush(self._heap, (-seq, key))  # newest first
+            self.counters["scheduled"] += 1
+            self._cond.notify()
+            return True
+
+    def cancel(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop queued and ready entries whose key matches `predicate` (e.g. a changed job)."""
+        with self._cond:
+            queued = [k for k in self._queued if predicate(k)]
+            for k in queued:
+                del self._queued[k]
+            self.counters["cancelled"] += len(queued)
+            ready = [k for k in self._ready if predicate(k)]
+            for k in ready:
+                self._waste(self._ready.pop(k))
+        return len(queued) + len(ready)
+
+    # ---- consuming ----
+    def get(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, str]:
+        """
+        Result for `key`: a ready prefetch, the in-progress one, or a fresh run of `fn`.
+        Returns `(result, source)` with source "ready" | "in_flight" | "shared" | "run".
+        """
+        with self._cond:
+            self._expire()
+            entry = self._ready.pop(key, None)
+            if entry is None:
+                if key in self._queued:      # not started yet; the request runs it now
+                    del self._queued[key]
+                joined = key in self._running
+                if joined:
+                    self._claimed[key] = self._claimed.get(key, 0) + 1
+                    self.counters["hits_in_flight"] += 1
+                else:
+                    self.counters["misses"] += 1
+            else:
+                self.counters["hits_ready"] += 1
+                self.saved_s += entry.run_s
+        if entry is not None:
+            if entry.error is not None:
+                raise entry.error
+            return entry.result, "ready"
+        if not joined:
+            result, shared = self.singleflight.do(key, fn)
+            return result, "shared" if shared else "run"
+
+        def take_or_run():
+            # The prefetch may have finished between our claim and this call.
+            with self._cond:
+                entry = self._handoff.get(key)
+            if entry is None:
+                return fn()
+            if entry.error is not None:
+                raise entry.error
+            return entry.result
+
+        try:
+            result, _ = self.singleflight.do(key, take_or_run)
+        finally:
+            with self._cond:
+                self._claimed[key] -= 1
+                if not self._claimed[key]:
+                    del self._claimed[key]
+                    self._handoff.pop(key, None)
+        return result, "in_flight"
+
+    # ---- workers ----
+    def _ensure_workers(self) -> None:
+        # Threads do not survive fork: start them in the process that schedules.
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"prefetch-{i}", daemon=True).start()
+
+    def _next(self) -> tuple[Hashable, Callable[[], Any]]:
+        with self._cond:
+            while True:
+                while self._heap:
+                    neg_seq, key = heapq.heappop(self._heap)
+                    item = self._queued.get(key)
+                    if item is None or item[0] != -neg_seq:
+                        continue                 # cancelled, claimed or re-queued since
+                    del self._queued[key]
+                    now = time.monotonic()
+                    while self._started and now - self._started[0] > 3600:
+                        self._started.popleft()
+                    if len(self._started) >= self.budget_per_hour:
+                        self.counters["over_budget"] += 1
+                        continue
+                    self._started.append(now)
+                    self._running.add(key)
+                    self.counters["started"] += 1
+                    return key, item[1]
+                self._cond.wait()
+
+    def _kept_errors(self) -> tuple[type[BaseException], ...]:
+        if callable(self.keep_errors):
+            self.keep_errors = tuple(self.keep_errors())
+        return self.keep_errors
+
+    def _work(self) -> None:
+        while True:
+            key, fn = self._next()
+            t0 = time.monotonic()
+            led = []  # set when this worker runs fn itself (and so publishes)
+
+            def run(key=key, fn=fn, t0=t0, led=led):
+                # Publish before SingleFlight releases the key: a request arriving after
+                # that finds the result in _ready instead of starting a second run.
+                led.append(True)
+                try:
+                    result = fn()
+                except self._kept_errors() as e:
+                    self._publish(key, None, e, time.monotonic() - t0)
+                    raise
+                self._publish(key, result, None, time.monotonic() - t0)
+                return result
+
+            try:
+                _, shared = self.singleflight.do(key, run)
+            except self._kept_errors():
+                shared = not led  # a user's run we joined ended with e.g. a clarification
+            except Exception as e:
+                print(f"prefetch {key!r} failed: {e}")
+                with self._cond:
+                    self._running.discard(key)
+                    self.counters["errors"] += 1
+                continue
+            if shared:  # joined a user's run for the same key; they already have the outcome
+                with self._cond:
+                    self._running.discard(key)
+                    self.counters["completed"] += 1
+
+    def _publish(self, key: Hashable, result: Any, error: BaseException | None, run_s: float) -> None:
+        with self._cond:
+            self._running.discard(key)
+            self.counters["completed"] += 1
+            if key in self._claimed:         # requests joined the run; they take the result from it
+                self._handoff[key] = _Ready(result, error, run_s)
+                self.saved_s += run_s
+                return
+            self._ready[key] = _Ready(result, error, run_s)
+            while len(self._ready) > self.max_ready:
+                self._waste(self._ready.popitem(last=False)[1])
+
+    # ---- bookkeeping (callers hold the lock) ----
+    def _waste(self, entry: _Ready) -> None:
+        self.counters["wasted"] += 1
+        self.wasted_s += entry.run_s
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._ready.items() if now - e.finished_at > self.ttl_s]:
+            self._waste(self._ready.pop(key))
+
+    def stats(self) -> dict:
+        with self._cond:
+            c = dict(self.counters)
+            hits = c["hits_ready"] + c["hits_in_flight"]
+            finished = hits + c["wasted"]
+            c.update(
+                queued=len(self._queued), running=len(self._running), ready=len(self._ready),
+                hit_rate=round(hits / (hits + c["misses"]), 3) if hits + c["misses"] else None,
+                waste_rate=round(c["wasted"] / finished, 3) if finished else None,
+                saved_s=round(self.saved_s, 3), wasted_s=round(self.wasted_s, 3),
+            )
+        return c
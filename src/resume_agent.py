@@ -1,11 +1,11 @@
 # resume_agent.py
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import TypedDict, List, Optional, Literal, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict, List, Optional, Literal, Callable, Any, NamedTuple
 from typing_extensions import Annotated
-import operator
 import os
+import re
 
 from pydantic import BaseModel, Field
 
@@ -13,8 +13,16 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.language_models import BaseChatModel
 from langchain_core.tools import tool, Tool
-from langchain_openai import ChatOpenAI
+
+from src.stores import Store, JobStore, ResumeStore
+from src.model_router import ModelRouter, default_openai_router
+from src.state_compaction import MAX_MESSAGES, TextBlobStore, bounded_messages, state_size
+from src.page_fit import fit_to_one_page, job_keywords
+from src.job_profile import PROFILE_SYSTEM_PROMPT, JobProfile, JobProfileCache
+from src.artifact_writer import ArtifactWriter, default_writer
 
 
 # -----------------------------
@@ -24,27 +32,36 @@ from langchain_openai import ChatOpenAI
 class AgentState(TypedDict):
     job_id: Optional[str]
     candidate_id: Optional[str]
-    job_text: Optional[str]
-    resume_text: Optional[str]
+    job_text: Optional[str]            # checkpointed as a TextBlobStore ref
+    job_profile: Optional[str]         # JobProfile.to_prompt(), blob ref; None -> prompts use job_text
+    resume_text: Optional[str]         # checkpointed as a TextBlobStore ref
     needs_clarification: Optional[bool]
     question: Optional[str]
     clarification_response: Optional[str]
-    tailored_resume: Optional[str]
-    messages: Annotated[List[BaseMessage], operator.add]  # reducer: concat
+    tailored_resume: Optional[str]     # checkpointed as a TextBlobStore ref
+    messages: Annotated[List[BaseMessage], bounded_messages(MAX_MESSAGES)]  # reducer: concat, then compact
 
 
-@dataclass
-class JobStore:
-    data: dict
-    def __init__(self, data: dict | None = None):
-        self.data = data or {}
+# Large text fields kept out of checkpoints; run()/continue_run() return them resolved.
+BLOB_FIELDS = ("job_text", "job_profile", "resume_text", "tailored_resume")
 
 
-@dataclass
-class ResumeStore:
-    data: dict
-    def __init__(self, data: dict | None = None):
-        self.data = data or {}
+def job_as_text(job: Any) -> str:
+    """Prompt text for a stored job: strings pass through, card dicts/records are flattened."""
+    if not job:
+        return ""
+    if isinstance(job, str):
+        return job
+    get = job.get
+    lines = [" | ".join(str(v) for v in (get("title"), get("company"), get("location"),
+                                         get("type"), get("salary")) if v)]
+    summary = get("summary")
+    if summary:
+        lines.extend(f"- {s}" for s in ([summary] if isinstance(summary, str) else summary))
+    if get("benefits"):
+        lines.append(f"Benefits: {get('benefits')}")
+    lines.append(get("description") or "")
+    return "\n".join(line for line in lines if line)
 
 
 # -----------------------------
@@ -65,6 +82,140 @@ class ClarificationNeeded(Exception):
         self.question = question
         super().__init__(question)
 
+# -----------------------------
+# Tailoring prompts
+# -----------------------------
+
+TAILOR_RULES = (
+    "You tailor resumes for specific jobs. Preserve truthful content, amplify relevant experience, "
+    "and trim unrelated material. Keep it concise, ATS-friendly, and easy to scan.\n\n"
+)
+
+TAILOR_OUTPUT_FORMAT = (
+    "OUTPUT FORMAT (strict):\n"
+    "- Use Markdown with minimal inline HTML allowed (<hr>, <br>, <small>). Do NOT use code fences.\n"
+    "- Start with a clean name/contact header, then SUMMARY, SKILLS, EXPERIENCE, PROJECTS (optional), EDUCATION, CERTIFICATIONS (optional).\n"
+    "- Keep total length ~500–700 words to fit neatly on one page when converted to PDF.\n"
+    "- Use short, impact-focused bullets (start with a strong verb; include metrics where truthful).\n"
+    "- Avoid tables, images, or wide layouts. No multi-column.\n"
+    "- Use bold for company and role, italic for dates/location. Keep consistent.\n"
+    "- Use an <hr> between major sections for print clarity. You may use <small> for secondary info.\n"
+    "- If content risks spilling to a second page, prioritize relevance to the job and cut low-value details.\n\n"
+)
+
+HEADER_TEMPLATE = (
+    "HEADER TEMPLATE (fill with candidate info if available from resume or clarifications):\n"
+    "# CANDIDATE NAME\n"
+    "<small>City, Country · Email · Phone · LinkedIn/GitHub</small>\n"
+    "<hr>\n\n"
+)
+
+
+class SectionSpec(NamedTuple):
+    name: str
+    template: str
+    word_budget: int   # per-section share of the ~500–700 word one-page budget
+    optional: bool = False
+
+
+SECTION_SPECS = (
+    SectionSpec("SUMMARY", (
+        "## SUMMARY\n"
+        "1–3 lines tailored to the job’s keywords (skills, domain, impact). Avoid buzzword salad.\n\n"
+    ), 60),
+    SectionSpec("SKILLS", (
+        "## SKILLS\n"
+        "- Languages/Frameworks: …\n"
+        "- Data/ML: …\n"
+        "- Cloud/Infra: …\n"
+        "- Other: …\n\n"
+    ), 70),
+    SectionSpec("EXPERIENCE", (
+        "## EXPERIENCE\n"
+        "**Company — Role**  *Dates · Location*\n"
+        "- Result-first bullet with metric (what → how → impact).\n"
+        "- Another targeted bullet aligned with job requirements (e.g., LTR, bandits, A/B testing).\n"
+        "- Keep 3–5 bullets per role.\n\n"
+    ), 340),
+    SectionSpec("PROJECTS", (
+        "## PROJECTS (optional if adds value)\n"
+        "**Project Name** — brief, measurable outcome; tech stack.\n\n"
+    ), 80, optional=True),
+    SectionSpec("EDUCATION", (
+        "## EDUCATION\n"
+        "**Degree**, Institution — Year (optional GPA/awards if strong).\n\n"
+    ), 40),
+    SectionSpec("CERTIFICATIONS", (
+        "## CERTIFICATIONS (optional)\n"
+        "- Name — Issuer (Year)\n\n"
+    ), 30, optional=True),
+)
+
+STYLE_GUARDRAILS = (
+    "STYLE GUARDRAILS:\n"
+    "- Prefer digits for numbers (e.g., 15%, 10M users).\n"
+    "- No personal pronouns; no full sentences in SKILLS.\n"
+    "- No excessive italics/bold beyond structure above.\n"
+    "- No hyperlinks with long URLs; show display names only.\n"
+    "- No placeholders left unresolved.\n"
+)
+
+TAILOR_SYSTEM_PROMPT = (
+    TAILOR_RULES + TAILOR_OUTPUT_FORMAT + HEADER_TEMPLATE
+    + "SECTION TEMPLATES:\n" + "".join(spec.template for spec in SECTION_SPECS)
+    + STYLE_GUARDRAILS
+)
+
+OUTLINE_SYSTEM_PROMPT = (
+    "You plan a tailored one-page resume before its sections are written in parallel. "
+    "From the resume and job, return: the candidate's name; one contact line (City, Country · Email · "
+    "Phone · LinkedIn/GitHub, only what is known); a one-sentence target positioning; 5–10 job keywords "
+    "the candidate can truthfully claim; and which optional sections (PROJECTS, CERTIFICATIONS) add value."
+)
+
+
+class ResumeOutline(BaseModel):
+    name: str = Field(default="", description="Candidate name as it should appear in the header.")
+    contact_line: str = Field(default="", description="City, Country · Email · Phone · LinkedIn/GitHub (known parts only).")
+    positioning: str = Field(default="", description="One sentence: how the resume should be angled for this job.")
+    focus_keywords: List[str] = Field(default_factory=list, description="Job keywords to emphasise, truthfully.")
+    optional_sections: List[str] = Field(
+        default_factory=list, description="Optional sections worth including: PROJECTS and/or CERTIFICATIONS."
+    )
+
+
+def _strip_section_heading(body: str, name: str) -> str:
+    """Drop a leading `## NAME` (and stray <hr>) the model may have added; we add our own."""
+    lines = (body or "").strip().splitlines()
+    while lines and (
+        (lines[0].startswith("#") and lines[0].lstrip("# ").upper().startswith(name))
+        or lines[0].strip().lower() in ("<hr>", "")
+    ):
+        lines.pop(0)
+    while lines and lines[-1].strip().lower() in ("<hr>", ""):
+        lines.pop()
+    return "\n".join(lines).strip()
+
+
+def _name_line(text: str | None) -> str:
+    """The resume's leading name: its first line up to a separator, if that is name-sized."""
+    first = next((line for line in (text or "").splitlines() if line.strip()), "")
+    name = re.split(r"\s[—–|·•-]\s|[,;:]", first, maxsplit=1)[0].strip()
+    return name if 0 < len(name.split()) <= 5 else ""
+
+
+def _trim_words(body: str, budget: int) -> str:
+    """Enforce a section's word budget by dropping trailing lines (keeps Markdown intact)."""
+    lines, total = [], 0
+    for line in body.splitlines():
+        words = len(line.split())
+        if total + words > budget * 1.15 and lines:
+            break
+        lines.append(line)
+        total += words
+    return "\n".join(lines)
+
+
 # -----------------------------
 # Agent Class
 # -----------------------------
@@ -76,13 +227,22 @@ class ResumeTailorAgent:
 
     def __init__(
         self,
-        job_store: JobStore | None = None,
-        resume_store: ResumeStore | None = None,
+        job_store: Store | None = None,
+        resume_store: Store | None = None,
         save_dir: str = "./tailored",
-        llm: ChatOpenAI | None = None,
+        llm: BaseChatModel | None = None,
         checkpointer: MemorySaver | None = None,
+        blob_store: TextBlobStore | None = None,
+        router: ModelRouter | None = None,
+        tailor_mode: Literal["single", "sections"] | None = None,
+        max_pages: int | None = 1,
+        job_profiles: bool | None = None,
+        profile_cache: JobProfileCache | None = None,
+        artifact_writer: ArtifactWriter | None = None,
     ) -> None:
-        # Dependencies (DI-friendly)
+        # Dependencies (DI-friendly). These are defaults only: per-run stores passed to
+        # run()/continue_run() travel in the graph config, so one compiled agent can
+        # serve concurrent requests without sharing mutable state.
         self.Job_store = job_store or JobStore(
             data={
                 "job-123": (
@@ -100,8 +260,26 @@ class ResumeTailorAgent:
             }
         )
         self.save_dir = save_dir
-        self.llm = llm or ChatOpenAI(model="gpt-4o-mini")  # relies on OPENAI_API_KEY env var
+        # Saved resumes are written behind the graph (atomic rename, batched fsync).
+        self.artifacts = artifact_writer or default_writer()
+        # "single": one long generation; "sections": outline + sections generated concurrently.
+        self.tailor_mode = tailor_mode or os.environ.get("TAILOR_MODE", "single")
+        # Generated resumes are trimmed locally to this many PDF pages (None: keep as generated).
+        self.max_pages = max_pages
+        # Prompts see a cached structured profile of the job instead of the raw description
+        # (JOB_PROFILES=off restores the full text).
+        self.job_profiles = job_profiles if job_profiles is not None else os.environ.get("JOB_PROFILES", "on") != "off"
+        self.profile_cache = profile_cache or JobProfileCache.default()
+        # Per-node model routing. An explicit `llm` (DI / fake models in tests) serves every
+        # node; otherwise analyze and tailor get separate OpenAI handles with fallbacks
+        # (relies on OPENAI_API_KEY env var). Structured-output runnables are built here, once.
+        self.llm = llm
+        node_schemas = {"analyze": ClarifyDecision, "outline": ResumeOutline, "profile": JobProfile}
+        if router is None:
+            router = ModelRouter.single(llm, node_schemas) if llm is not None else default_openai_router(node_schemas)
+        self.router = router
         self.checkpointer = checkpointer or MemorySaver()
+        self.blobs = blob_store if blob_store is not None else TextBlobStore()  # an empty store is falsy
 
         # Build tools (as bound callables capturing `self`)
         self.fetch_job_tool: Tool = self._make_fetch_job_tool()
@@ -116,12 +294,33 @@ class ResumeTailorAgent:
     # Public API
     # -------------------------
 
-    def run(self, initial_state: AgentState, thread_id: str) -> AgentState:
+    def run(
+        self,
+        initial_state: AgentState,
+        thread_id: str,
+        job_store: Store | None = None,
+        resume_store: Store | None = None,
+    ) -> AgentState:
         """
         Execute the full workflow (start -> end) with a given thread_id.
+        `job_store` / `resume_store` override the agent defaults for this run only.
         """
-        cfg = {"configurable": {"thread_id": thread_id}}
-        return self.graph.invoke(initial_state, config=cfg)
+        cfg = self._config(thread_id, job_store, resume_store)
+        return self.blobs.hydrate(self.graph.invoke(initial_state, config=cfg), BLOB_FIELDS)
+
+    async def arun(
+        self,
+        initial_state: AgentState,
+        thread_id: str,
+        job_store: Store | None = None,
+        resume_store: Store | None = None,
+    ) -> AgentState:
+        """
+        Async `run`: the (blocking) LLM nodes run in the event loop's executor, so
+        many runs can be in flight from one loop (see src/bulk_tailor.py).
+        """
+        cfg = self._config(thread_id, job_store, resume_store)
+        return self.blobs.hydrate(await self.graph.ainvoke(initial_state, config=cfg), BLOB_FIELDS)
 
     def update_state(self, thread_id: str, patch: dict) -> None:
         """
@@ -130,12 +329,32 @@ class ResumeTailorAgent:
         cfg = {"configurable": {"thread_id": thread_id}}
         self.graph.update_state(cfg, patch)
 
-    def continue_run(self, thread_id: str) -> AgentState:
+    def continue_run(
+        self,
+        thread_id: str,
+        job_store: Store | None = None,
+        resume_store: Store | None = None,
+    ) -> AgentState:
         """
         Continue running from the latest checkpoint (e.g., after update_state()).
         """
+        cfg = self._config(thread_id, job_store, resume_store)
+        return self.blobs.hydrate(self.graph.invoke({}, config=cfg), BLOB_FIELDS)
+
+    def state_size(self, thread_id: str) -> dict[str, int]:
+        """
+        Per-channel serialized size (bytes) of the latest checkpoint for `thread_id`,
+        plus `total`. Text fields count as refs; the blobs themselves are shared.
+        """
         cfg = {"configurable": {"thread_id": thread_id}}
-        return self.graph.invoke({}, config=cfg)
+        return state_size(self.graph.get_state(cfg).values, self.checkpointer.serde)
+
+    def _config(self, thread_id: str, job_store: Store | None, resume_store: Store | None) -> RunnableConfig:
+        return {"configurable": {
+            "thread_id": thread_id,
+            "job_store": job_store or self.Job_store,
+            "resume_store": resume_store or self.Resume_store,
+        }}
 
     # -------------------------
     # Tool factories
@@ -143,16 +362,18 @@ class ResumeTailorAgent:
 
     def _make_fetch_job_tool(self) -> Tool:
         @tool("fetch_job")
-        def _fetch_job(job_id: str) -> str:
+        def _fetch_job(job_id: str, config: RunnableConfig) -> str:
             """Fetch full job posting text by job_id."""
-            return self.Job_store.data.get(job_id, "")
+            store = config.get("configurable", {}).get("job_store") or self.Job_store
+            return job_as_text(store.get(job_id, ""))
         return _fetch_job
 
     def _make_fetch_resume_tool(self) -> Tool:
         @tool("fetch_resume")
-        def _fetch_resume(candidate_id: str) -> str:
+        def _fetch_resume(candidate_id: str, config: RunnableConfig) -> str:
             """Fetch candidate resume text by candidate_id."""
-            return self.Resume_store.data.get(candidate_id, "")
+            store = config.get("configurable", {}).get("resume_store") or self.Resume_store
+            return store.get(candidate_id, "") or ""
         return _fetch_resume
 
     # def _make_ask_candidate_tool(self) -> Tool:
@@ -181,13 +402,11 @@ class ResumeTailorAgent:
         return _ask_candidate
     def _make_save_resume_tool(self) -> Tool:
         @tool("save_tailored_resume")
-        def _save_tailored_resume(filename: str, content: str, directory: str | None = None) -> str:
-            """Save the tailored resume to a directory and return the path."""
-            target_dir = directory or self.save_dir
-            os.makedirs(target_dir, exist_ok=True)
-            path = os.path.join(target_dir, filename)
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
+        def _save_tailored_resume(filename: str, content: str, directory: str | None = None,
+                                  candidate_id: str | None = None, job_id: str | None = None) -> str:
+            """Queue the tailored resume for saving to a directory and return the path it will have."""
+            path = os.path.join(directory or self.save_dir, filename)
+            self.artifacts.submit(path, content, candidate=candidate_id, job=job_id, kind="markdown")
             return path
         return _save_tailored_resume
 
@@ -200,6 +419,7 @@ class ResumeTailorAgent:
 
         # Register nodes
         graph.add_node("fetch_job", self._node_fetch_job)
+        graph.add_node("profile_job", self._node_profile_job)
         graph.add_node("fetch_resume", self._node_fetch_resume)
         graph.add_node("analyze", self._node_analyze)
         graph.add_node("ask", self._node_ask)
@@ -208,7 +428,8 @@ class ResumeTailorAgent:
 
         # Edges
         graph.add_edge(START, "fetch_job")
-        graph.add_edge("fetch_job", "fetch_resume")
+        graph.add_edge("fetch_job", "profile_job")
+        graph.add_edge("profile_job", "fetch_resume")
         graph.add_edge("fetch_resume", "analyze")
         graph.add_conditional_edges("analyze", self._route_after_analyze, {
             "ask": "ask",
@@ -227,19 +448,49 @@ class ResumeTailorAgent:
     # Node implementations
     # -------------------------
 
-    def _node_fetch_job(self, state: AgentState) -> AgentState:
+    def _node_fetch_job(self, state: AgentState, config: RunnableConfig) -> AgentState:
         job_id = state.get("job_id")
-        job_text = self.fetch_job_tool.invoke({"job_id": job_id})
+        job_text = self.fetch_job_tool.invoke({"job_id": job_id}, config=config)
         return {
-            "job_text": job_text,
+            "job_text": self.blobs.put(job_text),
             "messages": [AIMessage(content=f"Fetched job: {job_id} ({len(job_text)} chars)")]
         }
 
-    def _node_fetch_resume(self, state: AgentState) -> AgentState:
+    def _node_profile_job(self, state: AgentState) -> AgentState:
+        job_text = self.blobs.get(state.get("job_text"))
+        if not self.job_profiles or not job_text:
+            return {"job_profile": None}
+        try:
+            profile = self.profile_cache.get(job_text, self._extract_profile)
+        except Exception as e:  # profiling is an optimisation; the raw description still works
+            return {"job_profile": None,
+                    "messages": [AIMessage(content=f"Job profile unavailable ({type(e).__name__}); using full description")]}
+        if profile.is_empty():
+            return {"job_profile": None}
+        text = profile.to_prompt()
+        return {
+            "job_profile": self.blobs.put(text),
+            "messages": [AIMessage(content=f"Job profile: {len(text)} chars (description {len(job_text)} chars)")]
+        }
+
+    def _extract_profile(self, job_text: str) -> JobProfile:
+        return self.router.invoke_structured("profile", [
+            SystemMessage(content=PROFILE_SYSTEM_PROMPT),
+            HumanMessage(content=f"JOB POSTING:\n{job_text}\n\nReturn the requirement profile."),
+        ])
+
+    def _job_prompt(self, state: AgentState) -> str:
+        """The job as prompts see it: the compact profile when there is one, else the full text."""
+        profile = self.blobs.get(state.get("job_profile"))
+        if profile:
+            return f"JOB PROFILE:\n{profile}"
+        return f"JOB:\n{self.blobs.get(state.get('job_text'))}"
+
+    def _node_fetch_resume(self, state: AgentState, config: RunnableConfig) -> AgentState:
         cand_id = state.get("candidate_id")
-        resume_text = self.fetch_resume_tool.invoke({"candidate_id": cand_id})
+        resume_text = self.fetch_resume_tool.invoke({"candidate_id": cand_id}, config=config)
         return {
-            "resume_text": resume_text,
+            "resume_text": self.blobs.put(resume_text),
             "messages": [AIMessage(content=f"Fetched resume: {cand_id} ({len(resume_text)} chars)")]
         }
 
@@ -251,10 +502,11 @@ class ResumeTailorAgent:
             "Return a JSON object with `needs_clarification` and, if true, a single concise `question`."
         ))
         human = HumanMessage(content=(
-            f"JOB:\n{state.get('job_text')}\n\nRESUME:\n{state.get('resume_text')}\n\n"
+            f"{self._job_prompt(state)}\n\n"
+            f"RESUME:\n{self.blobs.get(state.get('resume_text'))}\n\n"
             "Do you need a clarification? If yes, ask the highest-value single question."
         ))
-        decision: ClarifyDecision = self.llm.with_structured_output(ClarifyDecision).invoke([system, human])
+        decision: ClarifyDecision = self.router.invoke_structured("analyze", [system, human])
         needs = bool(decision.needs_clarification)
         q = decision.question if needs else None
         return {
@@ -272,56 +524,85 @@ class ResumeTailorAgent:
         }
 
     def _node_tailor(self, state: AgentState) -> AgentState:
-        system = SystemMessage(content=(
-            "You tailor resumes for specific jobs. Preserve truthful content, amplify relevant experience, "
-            "and trim unrelated material. Keep it concise, ATS-friendly, and easy to scan.\n\n"
-            "OUTPUT FORMAT (strict):\n"
-            "- Use Markdown with minimal inline HTML allowed (<hr>, <br>, <small>). Do NOT use code fences.\n"
-            "- Start with a clean name/contact header, then SUMMARY, SKILLS, EXPERIENCE, PROJECTS (optional), EDUCATION, CERTIFICATIONS (optional).\n"
-            "- Keep total length ~500–700 words to fit neatly on one page when converted to PDF.\n"
-            "- Use short, impact-focused bullets (start with a strong verb; include metrics where truthful).\n"
-            "- Avoid tables, images, or wide layouts. No multi-column.\n"
-            "- Use bold for company and role, italic for dates/location. Keep consistent.\n"
-            "- Use an <hr> between major sections for print clarity. You may use <small> for secondary info.\n"
-            "- If content risks spilling to a second page, prioritize relevance to the job and cut low-value details.\n\n"
-            "HEADER TEMPLATE (fill with candidate info if available from resume or clarifications):\n"
-            "# CANDIDATE NAME\n"
-            "<small>City, Country · Email · Phone · LinkedIn/GitHub</small>\n"
-            "<hr>\n\n"
-            "SECTION TEMPLATES:\n"
-            "## SUMMARY\n"
-            "1–3 lines tailored to the job’s keywords (skills, domain, impact). Avoid buzzword salad.\n\n"
-            "## SKILLS\n"
-            "- Languages/Frameworks: …\n"
-            "- Data/ML: …\n"
-            "- Cloud/Infra: …\n"
-            "- Other: …\n\n"
-            "## EXPERIENCE\n"
-            "**Company — Role**  *Dates · Location*\n"
-            "- Result-first bullet with metric (what → how → impact).\n"
-            "- Another targeted bullet aligned with job requirements (e.g., LTR, bandits, A/B testing).\n"
-            "- Keep 3–5 bullets per role.\n\n"
-            "## PROJECTS (optional if adds value)\n"
-            "**Project Name** — brief, measurable outcome; tech stack.\n\n"
-            "## EDUCATION\n"
-            "**Degree**, Institution — Year (optional GPA/awards if strong).\n\n"
-            "## CERTIFICATIONS (optional)\n"
-            "- Name — Issuer (Year)\n\n"
-            "STYLE GUARDRAILS:\n"
-            "- Prefer digits for numbers (e.g., 15%, 10M users).\n"
-            "- No personal pronouns; no full sentences in SKILLS.\n"
-            "- No excessive italics/bold beyond structure above.\n"
-            "- No hyperlinks with long URLs; show display names only.\n"
-            "- No placeholders left unresolved.\n"
-        ))
+        if self.tailor_mode == "sections":
+            tailored = self._tailor_by_sections(state)
+        else:
+            system = SystemMessage(content=TAILOR_SYSTEM_PROMPT)
+            human = HumanMessage(content=self._tailor_context(state) + (
+                "Produce the tailored resume now, following the exact format and guardrails above."
+            ))
+            tailored = self.router.invoke("tailor", [system, human]).content
+        note = "Tailored resume created."
+        if self.max_pages:
+            # Measured against the PDF layout, so the saved PDF and the state agree.
+            job_text = self.blobs.get(state.get("job_text"))
+            profile = self.profile_cache.peek(job_text) if self.job_profiles else None
+            keywords = list(dict.fromkeys((profile.terms() if profile else []) + job_keywords(job_text)))
+            fit = fit_to_one_page(tailored, keywords, self.max_pages)
+            if fit.changed:
+                tailored = fit.markdown
+                note += f" Trimmed to {fit.pages} page(s): " + "; ".join(fit.trimmed)[:300]
+        return {"tailored_resume": self.blobs.put(tailored), "messages": [AIMessage(content=note)]}
+
+    def _tailor_context(self, state: AgentState) -> str:
         clar = state.get("clarification_response") or ""
-        human = HumanMessage(content=(
-            f"JOB:\n{state.get('job_text')}\n\nRESUME (ORIGINAL):\n{state.get('resume_text')}\n\n"
+        return (
+            f"{self._job_prompt(state)}\n\n"
+            f"RESUME (ORIGINAL):\n{self.blobs.get(state.get('resume_text'))}\n\n"
             f"CANDIDATE CLARIFICATIONS (if any): {clar}\n\n"
-            "Produce the tailored resume now, following the exact format and guardrails above."
-        ))
-        tailored = self.llm.invoke([system, human]).content
-        return {"tailored_resume": tailored, "messages": [AIMessage(content="Tailored resume created.")]}
+        )
+
+    def _tailor_by_sections(self, state: AgentState) -> str:
+        """
+        Section-parallel tailoring: one short outline call fixes the header and the shared
+        focus, then every section is generated concurrently within its word budget and
+        assembled in template order. Wall-clock time ~ outline + slowest section.
+        """
+        context = self._tailor_context(state)
+        outline: ResumeOutline = self.router.invoke_structured("outline", [
+            SystemMessage(content=OUTLINE_SYSTEM_PROMPT),
+            HumanMessage(content=context + "Produce the outline now."),
+        ])
+        wanted = [
+            spec for spec in SECTION_SPECS
+            if not spec.optional or spec.name in {n.upper() for n in (outline.optional_sections or [])}
+        ]
+        shared = (
+            f"TARGET POSITIONING: {outline.positioning}\n"
+            f"FOCUS KEYWORDS: {', '.join(outline.focus_keywords or [])}\n\n"
+        )
+
+        def generate(spec: SectionSpec) -> str:
+            omit = (
+                "If the original resume has nothing truthful for this section, reply with exactly OMIT.\n"
+                if spec.optional else ""
+            )
+            system = SystemMessage(content=(
+                f"{TAILOR_RULES}"
+                f"You are writing ONLY the `## {spec.name}` section of the resume (the other sections are "
+                f"written in parallel). Hard limit: {spec.word_budget} words. Follow this template:\n"
+                f"{spec.template}\n"
+                f"{omit}"
+                f"{STYLE_GUARDRAILS}"
+            ))
+            human = HumanMessage(content=context + shared + f"Write the {spec.name} section now.")
+            return self.router.invoke("section", [system, human]).content
+
+        with ThreadPoolExecutor(max_workers=len(wanted)) as pool:
+            bodies = list(pool.map(generate, wanted))
+
+        # No name from the outline: use the resume's first line (where the name normally is).
+        name = outline.name.strip() or _name_line(self.blobs.get(state.get("resume_text")))
+        header = [f"# {name}"] if name else []
+        if outline.contact_line:
+            header.append(f"<small>{outline.contact_line}</small>")
+        sections = []
+        for spec, body in zip(wanted, bodies):
+            body = _strip_section_heading(body, spec.name)
+            if body and body.upper() != "OMIT":
+                sections.append(f"## {spec.name}\n{_trim_words(body, spec.word_budget)}\n")
+        head = "\n".join(header) + "\n<hr>\n\n" if header else ""
+        return head + "\n<hr>\n\n".join(sections)
 
     def _node_save(self, state: AgentState) -> AgentState:
         cand = state.get("candidate_id") or "candidate"
@@ -329,8 +610,10 @@ class ResumeTailorAgent:
         filename = f"{cand}__for__{job}.md"
         path = self.save_tailored_resume_tool.invoke({
             "filename": filename,
-            "content": state.get("tailored_resume") or "",
-            "directory": self.save_dir
+            "content": self.blobs.get(state.get("tailored_resume")) or "",
+            "directory": self.save_dir,
+            "candidate_id": cand,
+            "job_id": job,
         })
         return {"messages": [AIMessage(content=f"Saved tailored resume to: {path}")]}
 
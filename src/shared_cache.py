@@ -0,0 +1,373 @@
+# shared_cache.py
+"""
+Cross-process persona cache for gunicorn workers.
+
+Loaded persona data (job cards, descriptions, extracted resume text) is written
+once to a data file in a shared directory (`/dev/shm` when available) and
+memory-mapped by every worker, so N workers share one copy in the page cache
+instead of each parsing folders / PDFs into its own heap.
+
+A small mmap'd control file holds one slot per persona with a generation
+counter. Readers check it without locking (a seqlock: retry while a write is
+in progress); only loaders and invalidations take an flock. Bumping a
+persona's generation in any worker makes every worker reload it on its next
+read, which is how a reload in one process becomes visible to all.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterable, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: cache is shared between threads only
+    fcntl = None
+
+from src.compact_store import CompactJobStore, JobRecord
+
+_CONTROL_MAGIC = b"PCCTRL1\0"
+_DATA_MAGIC = b"PCDATA1\0"
+_HEADER = struct.Struct("<8sQ")       # magic, slot count
+_SLOT = struct.Struct("<QQ16s")       # seq (odd while being written), generation, persona key
+DEFAULT_SLOTS = 4096
+
+_MISSING_FILE = object()
+
+# (jobs, resume_text, persona_dir), the contract of utils.load_jobs_from_persona_folder
+Loaded = Tuple[Any, str, str]
+
+
+def default_cache_dir(personas_root: str = "personas") -> str:
+    """Per user and per personas folder, so two checkouts on one host never share slots."""
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    root = hashlib.blake2b(os.path.abspath(personas_root).encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(base, f"aiagent-persona-cache-{os.getuid() if hasattr(os, 'getuid') else 0}-{root}")
+
+
+def folder_signature(path: str) -> str:
+    """
+    Cheap fingerprint of a persona's sources: `resume.pdf` and the files in `jobs/`
+    (names, sizes, mtimes). Generated PDFs and explanations next to them are left
+    out, so tailoring does not invalidate the cached persona.
+    """
+    sources = [os.path.join(path, "resume.pdf")]
+    try:
+        sources.extend(de.path for de in os.scandir(os.path.join(path, "jobs")) if de.is_file())
+    except OSError:
+        pass
+    parts = []
+    for source in sources:
+        try:
+            st = os.stat(source)
+        except OSError:
+            continue
+        parts.append(f"{os.path.relpath(source, path)}:{st.st_size}:{st.st_mtime_ns}")
+    return hashlib.blake2b("\n".join(sorted(parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _MappedJobStore(CompactJobStore):
+    """CompactJobStore whose descriptions live in a shared, read-only data file."""
+
+    def __init__(self, cards: Iterable[tuple[dict, int, int]], view: memoryview):
+        self._records = {}
+        self._lock = threading.Lock()
+        self._view = view
+        for card, off, length in cards:
+            rec = JobRecord(card, self, off, length)
+            self._records[rec.id if isinstance(rec.id, str) else str(rec.id)] = rec
+
+    def _read_blob(self, off: int, length: int) -> str:
+        return str(self._view[off:off + length], "utf-8") if length else ""
+
+    def close(self) -> None:
+        pass  # the mapping belongs to the cache and may be shared by other stores
+
+
+class _Entry:
+    __slots__ = ("generation", "jobs", "resume", "persona_dir", "map")
+
+    def __init__(self, generation, jobs, resume, persona_dir, m):
+        self.generation = generation
+        self.jobs = jobs
+        self.resume = resume
+        self.persona_dir = persona_dir
+        self.map = m
+
+
+class SharedPersonaCache:
+    """
+    `get(persona, loader)` returns `(jobs, resume_text, persona_dir)` where `jobs`
+    is a CompactJobStore backed by the shared data file. The fast path (persona
+    already mapped at the current generation) is one lock-free 32-byte read.
+    """
+
+    def __init__(self, directory: str | None = None, slots: int = DEFAULT_SLOTS, personas_root: str = "personas"):
+        self.directory = directory or os.environ.get("PERSONA_CACHE_DIR") or default_cache_dir(personas_root)
+        os.makedirs(self.directory, exist_ok=True)
+        self.control_path = os.path.join(self.directory, "control")
+        self._local: dict[str, _Entry] = {}
+        self._thread_lock = threading.Lock()
+        self._lock_fd = None
+        self._lock_pid = None
+        self.hits = self.loads = self.maps = 0
+
+        size = _HEADER.size + slots * _SLOT.size
+        with self._flock():
+            fd = os.open(self.control_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self._control = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+            finally:
+                os.close(fd)
+            magic, count = _HEADER.unpack_from(self._control, 0)
+            if magic != _CONTROL_MAGIC:
+                _HEADER.pack_into(self._control, 0, _CONTROL_MAGIC, slots)
+                count = slots
+        self.slots = count
+
+    # -------------------------
+    # Locking
+    # -------------------------
+
+    def _flock(self):
+        cache = self
+
+        class _Guard:
+            def __enter__(self):
+                cache._thread_lock.acquire()
+                if fcntl is not None:
+                    # flock belongs to the open file, so a descriptor inherited across
+                    # fork (gunicorn --preload) would not exclude the other workers.
+                    if cache._lock_fd is None or cache._lock_pid != os.getpid():
+                        cache._lock_fd = os.open(os.path.join(cache.directory, "lock"), os.O_RDWR | os.O_CREAT, 0o600)
+                        cache._lock_pid = os.getpid()
+                    fcntl.flock(cache._lock_fd, fcntl.LOCK_EX)
+
+            def __exit__(self, *exc):
+                if fcntl is not None:
+                    fcntl.flock(cache._lock_fd, fcntl.LOCK_UN)
+                cache._thread_lock.release()
+
+        return _Guard()
+
+    # -------------------------
+    # Control slots (seqlock)
+    # -------------------------
+
+    @staticmethod
+    def _key(persona: str) -> bytes:
+        return hashlib.blake2b(persona.encode("utf-8"), digest_size=16).digest()
+
+    def _read_slot(self, index: int) -> tuple[int, bytes]:
+        off = _HEADER.size + index * _SLOT.size
+        spins, deadline = 0, None
+        while True:
+            seq, generation, key = _SLOT.unpack_from(self._control, off)
+            if not seq & 1 and struct.unpack_from("<Q", self._control, off)[0] == seq:
+                return generation, key
+            # Writer in progress: a slot update is three stores, so spin briefly, then back off.
+            spins += 1
+            if spins > 100:
+                deadline = deadline or time.monotonic() + 1.0
+                if time.monotonic() > deadline:
+                    # Only a writer that died mid-update leaves `seq` odd this long; callers
+                    # treat an unknown generation as a miss and reload.
+                    return generation, key
+                time.sleep(0 if spins < 1000 else 0.001)
+
+    def _write_slot(self, index: int, generation: int, key: bytes) -> None:
+        """Caller holds the flock."""
+        off = _HEADER.size + index * _SLOT.size
+        seq = struct.unpack_from("<Q", self._control, off)[0]
+        struct.pack_into("<Q", self._control, off, seq + 1)
+        struct.pack_into("<Q16s", self._control, off + 8, generation, key)
+        struct.pack_into("<Q", self._control, off, seq + 2)
+
+    def _find(self, key: bytes) -> tuple[int | None, int]:
+        """(slot index or None, generation). Open addressing; an all-zero key ends the probe."""
+        start = int.from_bytes(key[:8], "little") % self.slots
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            generation, slot_key = self._read_slot(index)
+            if slot_key == key:
+                return index, generation
+            if slot_key == b"\0" * 16:
+                return None, 0
+        return None, 0
+
+    def _claim(self, key: bytes) -> int | None:
+        """Caller holds the flock."""
+        start = int.from_bytes(key[:8], "little") % self.slots
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            _, slot_key = self._read_slot(index)
+            if slot_key in (key, b"\0" * 16):
+                if slot_key != key:
+                    self._write_slot(index, 1, key)
+                return index
+        return None
+
+    def generation(self, persona: str) -> int:
+        return self._find(self._key(persona))[1]
+
+    # -------------------------
+    # Data files
+    # -------------------------
+
+    def _data_path(self, key: bytes, generation: int) -> str:
+        return os.path.join(self.directory, f"{key.hex()}.{generation}.bin")
+
+    def _write_data(self, path: str, loaded: Loaded, signature: str | None) -> None:
+        jobs, resume, persona_dir = loaded
+        blob = bytearray()
+        cards = []
+        for job in (jobs.values() if hasattr(jobs, "values") else jobs):
+            card = job.to_dict() if hasattr(job, "to_dict") else dict(job)
+            desc = (card.pop("description", "") or "").encode("utf-8")
+            cards.append([card, len(blob), len(desc)])
+            blob += desc
+        resume_bytes = (resume or "").encode("utf-8")
+        index = json.dumps({
+            "persona_dir": persona_dir,
+            "signature": signature,
+            "jobs": cards,
+            "resume": [len(blob), len(resume_bytes)],
+        }, ensure_ascii=False).encode("utf-8")
+        blob += resume_bytes
+
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_DATA_MAGIC, len(index)))
+            f.write(index)
+            f.write(blob)
+        os.replace(tmp, path)
+
+    def _map_data(self, path: str, generation: int) -> tuple[_Entry, str | None] | None:
+        try:
+            with open(path, "rb") as f:
+                m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        magic, index_len = _HEADER.unpack_from(m, 0)
+        if magic != _DATA_MAGIC:
+            return None
+        start = _HEADER.size + index_len
+        index = json.loads(m[_HEADER.size:start])
+        view = memoryview(m)[start:]
+        jobs = _MappedJobStore(((c, off, n) for c, off, n in index["jobs"]), view)
+        off, n = index["resume"]
+        resume = str(view[off:off + n], "utf-8")
+        self.maps += 1
+        return _Entry(generation, jobs, resume, index["persona_dir"], m), index.get("signature")
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def get(self, persona: str, loader: Callable[[], Loaded],
+            signature: Callable[[], str] | None = None) -> Loaded:
+        """
+        Shared copy of `loader()` for `persona`. `signature` (e.g. a folder
+        fingerprint) is checked when a worker first maps a file, so data cached
+        by a previous server run is not served after the sources changed.
+        """
+        key = self._key(persona)
+        index, generation = self._find(key)
+        entry = self._local.get(persona)
+        if entry is not None and index is not None and entry.generation == generation:
+            self.hits += 1
+            return entry.jobs, entry.resume, entry.persona_dir
+
+        current_sig = signature() if signature else None
+        if index is not None:
+            mapped = self._map_data(self._data_path(key, generation), generation)
+            if mapped is not None and (signature is None or mapped[1] == current_sig):
+                return self._remember(persona, mapped[0])
+
+        with self._flock():
+            loaded = None
+            index, _ = self._find(key)
+            if index is None:
+                loaded = loader()
+                self.loads += 1
+                jobs, resume, persona_dir = loaded
+                if not jobs and not resume:  # nothing worth sharing: no slot, no data file
+                    return CompactJobStore(jobs), resume, persona_dir
+                index = self._claim(key)
+                if index is None:  # control table full: serve unshared
+                    return CompactJobStore(jobs), resume, persona_dir
+            generation, _ = self._read_slot(index)
+            path = self._data_path(key, generation)
+            mapped = self._map_data(path, generation)
+            if mapped is None or (signature is not None and mapped[1] != current_sig):
+                if mapped is not None:
+                    # Stale file from an earlier run: move to a new generation.
+                    generation += 1
+                    self._write_slot(index, generation, key)
+                    self._unlink_old(key, generation)
+                    path = self._data_path(key, generation)
+                if loaded is None:
+                    loaded = loader()
+                    self.loads += 1
+                self._write_data(path, loaded, current_sig)
+                mapped = self._map_data(path, generation)
+        return self._remember(persona, mapped[0])
+
+    def _remember(self, persona: str, entry: _Entry) -> Loaded:
+        # Superseded mappings are not closed: requests may still hold their job records.
+        self._local[persona] = entry
+        return entry.jobs, entry.resume, entry.persona_dir
+
+    def invalidate(self, persona: str, signature: str | None = None) -> bool:
+        """
+        Bump `persona`'s generation; every worker reloads it on its next `get`.
+        With `signature`, nothing happens if the current data already matches it
+        or is already invalidated, so several workers reacting to the same file
+        change cause a single reload.
+        """
+        key = self._key(persona)
+        with self._flock():
+            index, generation = self._find(key)
+            if index is None:
+                return False
+            if signature is not None:
+                stored = self._stored_signature(self._data_path(key, generation))
+                if stored is _MISSING_FILE or stored == signature:
+                    return False
+            self._write_slot(index, generation + 1, key)
+            self._unlink_old(key, generation + 1)
+            return True
+
+    def _stored_signature(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                magic, index_len = _HEADER.unpack(f.read(_HEADER.size))
+                return json.loads(f.read(index_len)).get("signature") if magic == _DATA_MAGIC else None
+        except (OSError, ValueError, struct.error):
+            return _MISSING_FILE
+
+    def reload(self, persona: str, loader: Callable[[], Loaded],
+               signature: Callable[[], str] | None = None) -> Loaded:
+        self.invalidate(persona)
+        return self.get(persona, loader, signature)
+
+    def _unlink_old(self, key: bytes, current: int) -> None:
+        # Mapped files stay readable after unlink, so other workers are unaffected.
+        prefix = key.hex() + "."
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".bin") and name != f"{prefix}{current}.bin":
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "loads": self.loads, "maps": self.maps, "personas": len(self._local)}
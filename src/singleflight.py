@@ -0,0 +1,96 @@
+# singleflight.py
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is in flight
+    block until it finishes and receive the same result (or the same exception).
+    Nothing is cached afterwards: the next call after completion runs again.
+
+    `expected` lists exceptions that are a normal outcome rather than a failure
+    (e.g. ClarificationNeeded); they are counted apart from `errors`. A callable
+    is resolved on first use, so callers need not import heavy modules up front.
+    """
+
+    def __init__(self, expected: tuple[type[BaseException], ...] | Callable[[], tuple] = ()):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.expected = expected
+        self.leaders = 0      # executions actually run
+        self.coalesced = 0    # calls served by someone else's execution
+        self.errors = 0
+        self.expected_errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return `(result, shared)`; `shared` is True when another caller did the work."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            expected = isinstance(e, self._expected())
+            with self._lock:
+                if expected:
+                    self.expected_errors += 1
+                else:
+                    self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def _expected(self) -> tuple[type[BaseException], ...]:
+        if callable(self.expected):
+            self.expected = tuple(self.expected())
+        return self.expected
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+            waiting = sum(c.waiters for c in self._calls.values())
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "expected_errors": self.expected_errors,
+            "in_flight": in_flight,
+            "waiting": waiting,
+        }
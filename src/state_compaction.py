@@ -0,0 +1,180 @@
+# state_compaction.py
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Iterable
+
+from langchain_core.messages import AIMessage
+
+
+# -----------------------------
+# Bounded / summarising messages reducer
+# -----------------------------
+
+MAX_MESSAGES = 12
+_SUMMARY_KEY = "compacted"
+
+
+def _content(m: Any) -> str:
+    if isinstance(m, dict):
+        return str(m.get("content", ""))
+    return str(getattr(m, "content", ""))
+
+
+def _first_line(m: Any) -> str:
+    """First non-blank line; tool-call messages often have empty content."""
+    return next((line.strip() for line in _content(m).splitlines() if line.strip()), "")
+
+
+def _compacted_count(m: Any) -> int:
+    kwargs = getattr(m, "additional_kwargs", None) or {}
+    return int(kwargs.get(_SUMMARY_KEY, 0))
+
+
+def bounded_messages(max_messages: int = MAX_MESSAGES) -> Callable[[list, list], list]:
+    """
+    Reducer for `AgentState.messages`: concatenates like `operator.add`, but once
+    the log exceeds `max_messages` the oldest entries are folded into a single
+    summary message at the head, so every checkpoint stays O(max_messages).
+    """
+    def reduce(left: list | None, right: list | None) -> list:
+        merged = list(left or []) + list(right or [])
+        if len(merged) <= max_messages:
+            return merged
+        keep = merged[-(max_messages - 1):]
+        dropped = merged[:-(max_messages - 1)]
+        count = sum(_compacted_count(m) or 1 for m in dropped)
+        gist = "; ".join(
+            line[:60] for line in (_first_line(m) for m in dropped if not _compacted_count(m)) if line
+        )
+        previous = next((_content(m) for m in dropped if _compacted_count(m)), "")
+        text = f"[{count} earlier steps compacted] " + "; ".join(p for p in (previous.split("] ", 1)[-1], gist) if p)
+        summary = AIMessage(content=text[:600], additional_kwargs={_SUMMARY_KEY: count})
+        return [summary] + keep
+    return reduce
+
+
+# -----------------------------
+# Content-addressed text fields
+# -----------------------------
+
+BLOB_PREFIX = "blob:sha256:"
+
+
+class TextBlobStore:
+    """
+    Stores large state text (job/resume/tailored resume) once per distinct content;
+    graph state carries only the `blob:sha256:<hex>` reference. With `directory`
+    set, blobs are also written to disk so refs stay resolvable across restarts
+    (use this together with a durable checkpointer).
+
+    Memory holds at most `max_bytes` of text (UTF-8), least recently used first out.
+    Evicted blobs are read back from `directory`; without one they are spilled
+    to a private temp folder (removed at exit) so no ref ever dangles.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = 32 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._blobs: OrderedDict[str, str] = OrderedDict()
+        self._nbytes = 0
+        self._spill: str | None = None
+        self._lock = threading.Lock()
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def put(self, text: str | None) -> str | None:
+        if not text:
+            return text
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            if digest in self._blobs:
+                self._blobs.move_to_end(digest)
+            else:
+                if self.directory:
+                    self._write(self.directory, digest, text)
+                self._remember(digest, text)
+        return BLOB_PREFIX + digest
+
+    def get(self, value: str | None) -> str | None:
+        """Resolve a ref; plain strings (e.g. text passed in the initial state) pass through."""
+        if not isinstance(value, str) or not value.startswith(BLOB_PREFIX):
+            return value
+        digest = value[len(BLOB_PREFIX):]
+        with self._lock:
+            text = self._blobs.get(digest)
+            if text is not None:
+                self._blobs.move_to_end(digest)
+                return text
+            folder = self.directory or self._spill
+        if folder is None:
+            raise KeyError(f"unknown state blob {value}")
+        try:
+            with open(os.path.join(folder, digest), "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            raise KeyError(f"unknown state blob {value}") from None
+        with self._lock:
+            if digest not in self._blobs:
+                self._remember(digest, text)
+        return text
+
+    def hydrate(self, state: dict, fields: Iterable[str]) -> dict:
+        """Copy of `state` with the given ref fields resolved to text."""
+        state = dict(state)
+        for field in fields:
+            if field in state:
+                state[field] = self.get(state[field])
+        return state
+
+    # ---- memory bound (callers hold the lock) ----
+    def _remember(self, digest: str, text: str) -> None:
+        self._blobs[digest] = text
+        self._nbytes += len(text.encode("utf-8"))
+        while self._nbytes > self.max_bytes and len(self._blobs) > 1:
+            old, old_text = self._blobs.popitem(last=False)
+            self._nbytes -= len(old_text.encode("utf-8"))
+            self.evictions += 1
+            if not self.directory:
+                if self._spill is None:
+                    self._spill = tempfile.mkdtemp(prefix="state-blobs-")
+                    atexit.register(shutil.rmtree, self._spill, True)
+                self._write(self._spill, old, old_text)
+
+    @staticmethod
+    def _write(folder: str, digest: str, text: str) -> None:
+        path = os.path.join(folder, digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    @property
+    def nbytes(self) -> int:
+        """UTF-8 size of the text held in memory (evicted blobs excluded)."""
+        return self._nbytes
+
+
+# -----------------------------
+# State-size metric
+# -----------------------------
+
+def state_size(values: dict, serde) -> dict[str, int]:
+    """Serialized size in bytes of each state channel (plus `total`), as the checkpointer would store it."""
+    sizes = {}
+    for key, value in values.items():
+        _, data = serde.dumps_typed(value)
+        sizes[key] = len(data)
+    sizes["total"] = sum(sizes.values())
+    return sizes
@@ -0,0 +1,166 @@
+# stores.py
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Iterable, Mapping
+
+
+# -----------------------------
+# Interface
+# -----------------------------
+
+class Store(ABC):
+    """
+    Read-only key/value storage used by the agent's fetch tools.
+
+    Backends implement `get_many`; `get` is derived from it. Values are whatever
+    the backend holds (job card dicts/records or plain text); the agent turns
+    them into prompt text.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Values for the keys that exist; missing keys are simply absent."""
+
+    def get(self, key: str, default: Any = "") -> Any:
+        return self.get_many([key]).get(key, default)
+
+
+class MemoryStore(Store):
+    """In-process dict (or any mapping with `.get`, e.g. CompactJobStore)."""
+
+    def __init__(self, data: Mapping | None = None):
+        self.data = data if data is not None else {}
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        found = {}
+        for key in keys:
+            value = self.data.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+
+# Backwards-compatible names: `JobStore(data)` / `ResumeStore(data)` are in-memory stores.
+class JobStore(MemoryStore):
+    """Job postings keyed by job id."""
+
+
+class ResumeStore(MemoryStore):
+    """Resume text keyed by candidate id."""
+
+
+# -----------------------------
+# Filesystem persona layout
+# -----------------------------
+
+class PersonaJobStore(Store):
+    """Jobs read from `personas/<persona>/jobs/job<ID>-card.json` (+ description)."""
+
+    def __init__(self, persona_dir: str):
+        self.jobs_dir = os.path.join(persona_dir, "jobs")
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        from src.utils import load_job_card
+
+        found = {}
+        for key in keys:
+            fname = f"job{key}-card.json"
+            if os.path.exists(os.path.join(self.jobs_dir, fname)):
+                found[key] = load_job_card(self.jobs_dir, fname)
+        return found
+
+
+class PersonaResumeStore(Store):
+    """Resume text extracted from `personas/<persona>/resume.pdf`, keyed by persona name."""
+
+    def __init__(self, personas_root: str = "personas"):
+        self.personas_root = personas_root
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        from src.utils import read_resume_text
+
+        found = {}
+        for key in keys:
+            path = os.path.join(self.personas_root, key, "resume.pdf")
+            if os.path.exists(path):
+                found[key] = read_resume_text(path)
+        return found
+
+
+# -----------------------------
+# SQLite snapshot (see src/ingest.py)
+# -----------------------------
+
+class SQLiteJobStore(Store):
+    """Jobs of one persona from a PersonaSnapshot; `get_many` is a single query."""
+
+    def __init__(self, snapshot, persona: str):
+        self.snapshot = snapshot
+        self.persona = persona
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        return self.snapshot.jobs_many(self.persona, list(keys))
+
+
+class SQLiteResumeStore(Store):
+    """Resume text from a PersonaSnapshot, keyed by persona name."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        return self.snapshot.resumes_many(list(keys))
+
+
+# -----------------------------
+# Read-through LRU cache
+# -----------------------------
+
+class CachedStore(Store):
+    """
+    Read-through LRU in front of any Store. Misses are fetched from the backend
+    in one `get_many` call; safe to share between threads.
+    """
+
+    def __init__(self, backend: Store, maxsize: int = 1024):
+        self.backend = backend
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    found[key] = self._cache[key]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = self.backend.get_many(missing)
+            found.update(fetched)
+            with self._lock:
+                for key, value in fetched.items():
+                    self._cache[key] = value
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return found
+
+    def invalidate(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
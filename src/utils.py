@@ -1,52 +1,92 @@
 import json
-from PyPDF2 import PdfReader
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, ListFlowable, ListItem
-from reportlab.lib.units import inch
+from functools import lru_cache
 import re
 import os
 
+# PyPDF2 and reportlab are imported inside the functions that use them, so importing
+# this module (and app.py) stays cheap; `resume_styles()` can be warmed up front.
+
+
+def load_job_card(jobs_dir: str, fname: str) -> dict:
+    """Read `jobN-card.json` plus its `jobN-description.txt` into one card dict."""
+    job_id = fname.split("-")[0][3:]
+    card_path = os.path.join(jobs_dir, fname)
+    desc_path = os.path.join(jobs_dir, f"job{job_id}-description.txt")
+    with open(card_path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+    # Some personas' cards omit "id"; the file name carries it.
+    job.setdefault("id", job_id)
+    if os.path.exists(desc_path):
+        with open(desc_path, "r", encoding="utf-8") as f:
+            job["description"] = f.read()
+    else:
+        job["description"] = "<p>No description available.</p>"
+    # Used to key rendered-fragment caches; changes whenever either file does.
+    job["source_mtime"] = max(
+        os.path.getmtime(p) for p in (card_path, desc_path) if os.path.exists(p)
+    )
+    return job
+
+
+def read_resume_text(resume_path: str) -> str:
+    """Extract normalised plain text from a resume PDF ("" if missing or unreadable)."""
+    if not os.path.exists(resume_path):
+        return ""
+    from src.pdf_text import extract_text
+    try:
+        return extract_text(resume_path)
+    except Exception as e:
+        print(f"Error reading resume.pdf: {e}")
+        return ""
+
 
 def load_jobs_from_persona_folder(persona_keyword: str) -> (list[dict], str, str):
     persona_dir = os.path.join("personas", persona_keyword)
     print(persona_dir)
     jobs = []
     if not os.path.isdir(persona_dir):
-        return jobs, ""
+        return jobs, "", persona_dir
 
     jobs_dir = os.path.join(persona_dir, "jobs")
     for fname in os.listdir(jobs_dir):
         if fname.startswith("job") and fname.endswith("-card.json"):
-            job_id = fname.split("-")[0][3:]
-            card_path = os.path.join(jobs_dir, fname)
-            desc_path = os.path.join(jobs_dir, f"job{job_id}-description.txt")
             try:
-                with open(card_path, "r", encoding="utf-8") as f:
-                    job = json.load(f)
-                if os.path.exists(desc_path):
-                    with open(desc_path, "r", encoding="utf-8") as f:
-                        job["description"] = f.read()
-                else:
-                    job["description"] = "<p>No description available.</p>"
-                jobs.append(job)
+                jobs.append(load_job_card(jobs_dir, fname))
             except Exception as e:
                 print(f"Error loading job {fname}: {e}")
 
     # Read resume.pdf as string
-    resume_txt = ""
-    resume_path = os.path.join(persona_dir, "resume.pdf")
-    if os.path.exists(resume_path):
-        try:
-            reader = PdfReader(resume_path)
-            resume_txt = "\n".join(page.extract_text() or "" for page in reader.pages)
-        except Exception as e:
-            print(f"Error reading resume.pdf: {e}")
+    resume_txt = read_resume_text(os.path.join(persona_dir, "resume.pdf"))
 
     print(jobs)
     print(resume_txt)
     return jobs, resume_txt, persona_dir
 
+@lru_cache(maxsize=1)
+def resume_styles():
+    """Resume paragraph styles, built once per process and shared read-only."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    by = styles.byName  # dict of existing styles
+
+    if "ResumeBody" not in by:
+        styles.add(ParagraphStyle(name="ResumeBody", parent=styles["Normal"],
+                                  fontName="Helvetica", fontSize=10.5, leading=13.5))
+    if "Small" not in by:
+        styles.add(ParagraphStyle(name="Small", parent=styles["ResumeBody"],
+                                  fontSize=8.5, leading=11))
+    if "H1" not in by:
+        styles.add(ParagraphStyle(name="H1", parent=styles["Heading1"],
+                                  fontName="Helvetica-Bold", fontSize=18, leading=22, spaceAfter=6))
+    if "H2" not in by:
+        styles.add(ParagraphStyle(name="H2", parent=styles["Heading2"],
+                                  fontName="Helvetica-Bold", fontSize=13, leading=16, spaceBefore=8, spaceAfter=4))
+    if "ResumeBullet" not in by:
+        styles.add(ParagraphStyle(name="ResumeBullet", parent=styles["ResumeBody"],
+                                  leftIndent=14, bulletIndent=6, spaceBefore=0, spaceAfter=2))
+    return styles
+
 # def save_resume_as_pdf(tailored_resume: str, persona_dir: str, job_id: str) -> bool:
 #     pdf_filename = f"updated_resume_job{job_id}.pdf"
 #     pdf_path = os.path.join(persona_dir, pdf_filename)
@@ -66,75 +106,50 @@ def load_jobs_from_persona_folder(persona_keyword: str) -> (list[dict], str, str
 #
 #     return True
 
-def save_resume_as_pdf(tailored_resume: str, persona_dir: str, job_id: str) -> bool:
-    os.makedirs(persona_dir, exist_ok=True)
-    pdf_filename = f"updated_resume_job{job_id}.pdf"
-    pdf_path = os.path.join(persona_dir, pdf_filename)
+# --- Page geometry shared by the PDF builder and the one-page fit estimator (src/page_fit.py) ---
+RESUME_PAGE_SIZE = (612.0, 792.0)  # reportlab.lib.pagesizes.letter, in points
+RESUME_MARGINS = {"leftMargin": 0.8 * 72, "rightMargin": 0.8 * 72, "topMargin": 0.7 * 72, "bottomMargin": 0.7 * 72}
 
-    # --- Styles ---
-    styles = getSampleStyleSheet()
-    by = styles.byName  # dict of existing styles
-
-    if "ResumeBody" not in by:
-        styles.add(ParagraphStyle(name="ResumeBody", parent=styles["Normal"],
-                                  fontName="Helvetica", fontSize=10.5, leading=13.5))
-    if "Small" not in by:
-        styles.add(ParagraphStyle(name="Small", parent=styles["ResumeBody"],
-                                  fontSize=8.5, leading=11))
-    if "H1" not in by:
-        styles.add(ParagraphStyle(name="H1", parent=styles["Heading1"],
-                                  fontName="Helvetica-Bold", fontSize=18, leading=22, spaceAfter=6))
-    if "H2" not in by:
-        styles.add(ParagraphStyle(name="H2", parent=styles["Heading2"],
-                                  fontName="Helvetica-Bold", fontSize=13, leading=16, spaceBefore=8, spaceAfter=4))
-    if "ResumeBullet" not in by:
-        styles.add(ParagraphStyle(name="ResumeBullet", parent=styles["ResumeBody"],
-                                  leftIndent=14, bulletIndent=6, spaceBefore=0, spaceAfter=2))
 
-    doc = SimpleDocTemplate(
-        pdf_path, pagesize=letter,
-        leftMargin=0.8*inch, rightMargin=0.8*inch, topMargin=0.7*inch, bottomMargin=0.7*inch
-    )
+# --- Minimal Markdown -> RL Paragraph text ---
+def md_inline_to_html(s: str) -> str:
+    s = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", s)                # bold
+    s = re.sub(r"(?<!\*)\*(.+?)\*(?!\*)", r"<i>\1</i>", s)        # italics
+    s = s.replace("<br>", "<br/>").replace("<br />", "<br/>")     # line breaks
+    return s
 
-    # --- Minimal Markdown -> RL Paragraph text ---
-    def md_inline_to_html(s: str) -> str:
-        s = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", s)                # bold
-        s = re.sub(r"(?<!\*)\*(.+?)\*(?!\*)", r"<i>\1</i>", s)        # italics
-        s = s.replace("<br>", "<br/>").replace("<br />", "<br/>")     # line breaks
-        return s
 
-    elements = []
-    lines = tailored_resume.splitlines()
+def resume_blocks(tailored_resume: str) -> list[tuple[str, object]]:
+    """
+    Parse the tailored Markdown into layout blocks:
+    ("hr", None), ("h1"|"h2"|"para"|"small", html), ("list", [item_html, ...]), ("blank", None).
+    """
+    blocks = []
     pending_list_items = []
 
     def flush_list():
         nonlocal pending_list_items
         if pending_list_items:
-            lst = ListFlowable(
-                [ListItem(Paragraph(md_inline_to_html(item), styles["ResumeBody"])) for item in pending_list_items],
-                bulletType='bullet', leftIndent=10
-            )
-            elements.append(lst)
+            blocks.append(("list", [md_inline_to_html(item) for item in pending_list_items]))
             pending_list_items = []
 
-    for raw in lines:
+    for raw in tailored_resume.splitlines():
         line = raw.rstrip()
 
         # horizontal rule
         if line.strip().lower() == "<hr>":
             flush_list()
-            elements.append(Spacer(1, 6))
-            elements.append(HRFlowable(width="100%", thickness=0.8, spaceBefore=4, spaceAfter=6))
+            blocks.append(("hr", None))
             continue
 
         # headings
         if line.startswith("## "):
             flush_list()
-            elements.append(Paragraph(md_inline_to_html(line[3:].strip()), styles["H2"]))
+            blocks.append(("h2", md_inline_to_html(line[3:].strip())))
             continue
         if line.startswith("# "):
             flush_list()
-            elements.append(Paragraph(md_inline_to_html(line[2:].strip()), styles["H1"]))
+            blocks.append(("h1", md_inline_to_html(line[2:].strip())))
             continue
 
         # bullets
@@ -145,18 +160,61 @@ def save_resume_as_pdf(tailored_resume: str, persona_dir: str, job_id: str) -> b
         # blank line
         if line.strip() == "":
             flush_list()
-            elements.append(Spacer(1, 6))
+            blocks.append(("blank", None))
             continue
 
         # regular paragraph (with <small> support)
         flush_list()
         if "<small>" in line.lower():
-            text = md_inline_to_html(line.replace("<small>", "").replace("</small>", ""))
-            elements.append(Paragraph(f'<font size="8.5">{text}</font>', styles["ResumeBody"]))
+            blocks.append(("small", md_inline_to_html(line.replace("<small>", "").replace("</small>", ""))))
         else:
-            elements.append(Paragraph(md_inline_to_html(line), styles["ResumeBody"]))
+            blocks.append(("para", md_inline_to_html(line)))
 
     flush_list()
+    return blocks
+
+
+def save_resume_as_pdf(tailored_resume: str, persona_dir: str, job_id: str, candidate: str | None = None) -> bool:
+    """
+    Render in memory, then write through the artifact writer (atomic rename) and
+    wait for it: callers serve or index the file right after this returns.
+    """
+    import io
+    from src.artifact_writer import default_writer
+
+    pdf_filename = f"updated_resume_job{job_id}.pdf"
+    pdf_path = os.path.join(persona_dir, pdf_filename)
+
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, ListFlowable, ListItem
+
+    # --- Styles ---
+    styles = resume_styles()
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=RESUME_PAGE_SIZE, **RESUME_MARGINS)
+
+    elements = []
+    for kind, value in resume_blocks(tailored_resume):
+        if kind == "hr":
+            elements.append(Spacer(1, 6))
+            elements.append(HRFlowable(width="100%", thickness=0.8, spaceBefore=4, spaceAfter=6))
+        elif kind == "h1":
+            elements.append(Paragraph(value, styles["H1"]))
+        elif kind == "h2":
+            elements.append(Paragraph(value, styles["H2"]))
+        elif kind == "list":
+            elements.append(ListFlowable(
+                [ListItem(Paragraph(item, styles["ResumeBody"])) for item in value],
+                bulletType='bullet', leftIndent=10
+            ))
+        elif kind == "blank":
+            elements.append(Spacer(1, 6))
+        elif kind == "small":
+            elements.append(Paragraph(f'<font size="8.5">{value}</font>', styles["ResumeBody"]))
+        else:
+            elements.append(Paragraph(value, styles["ResumeBody"]))
+
     elements.append(Spacer(1, 4))
     doc.build(elements)
+    default_writer().submit(pdf_path, buf.getvalue(), candidate=candidate, job=job_id, kind="pdf").result()
     return True